@@ -0,0 +1,195 @@
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from records import REGIONS
+
+
+class Dictionary:
+    # Dictionary encoding for a string column; code 0 is reserved for None.
+    def __init__(self):
+        self.values: List[Optional[str]] = [None]
+        self._codes: Dict[Optional[str], int] = {None: 0}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def encode(self, value: Optional[str]) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self._codes[value] = code
+            self.values.append(value)
+        return code
+
+
+class CarColumns:
+    # Columnar mirror of the car store, kept dense: a removed row is filled
+    # by moving the last row into its slot, so every column is always the
+    # first `size` entries of its array. Its own lock guards the columns;
+    # readers copy the rows they need under it and compute without it.
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.makes = Dictionary()
+        self.engines = Dictionary()
+        self._rows: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._allocate(capacity)
+
+    def _allocate(self, capacity: int) -> None:
+        old = getattr(self, "id", None)
+        columns = {
+            "id": np.zeros(capacity, dtype=np.int64),
+            "year": np.zeros(capacity, dtype=np.int32),
+            "price": np.full(capacity, np.nan, dtype=np.float64),
+            "make": np.zeros(capacity, dtype=np.int32),
+            "engine": np.zeros(capacity, dtype=np.int32),
+            "region": np.zeros(capacity, dtype=np.uint8),
+            "autonomous": np.zeros(capacity, dtype=np.bool_),
+        }
+        for name, column in columns.items():
+            if old is not None:
+                column[: self.size] = getattr(self, name)[: self.size]
+            setattr(self, name, column)
+
+    def _reserve(self, extra: int) -> None:
+        capacity = len(self.id)
+        if self.size + extra > capacity:
+            self._allocate(max(capacity * 2, self.size + extra))
+
+    def _write(self, row: int, id: int, car: Any) -> None:
+        self.id[row] = id
+        self.year[row] = car.year or 0
+        self.price[row] = np.nan if car.price is None else car.price
+        self.make[row] = self.makes.encode(car.make)
+        self.engine[row] = self.engines.encode(car.engine)
+        self.region[row] = car.sold_mask
+        self.autonomous[row] = bool(car.autonomous)
+
+    def add(self, id: int, car: Any) -> None:
+        with self._lock:
+            self._reserve(1)
+            self._write(self.size, id, car)
+            self._rows[id] = self.size
+            self.size += 1
+
+    def update(self, id: int, old: Any, car: Any) -> None:
+        with self._lock:
+            self._write(self._rows[id], id, car)
+
+    def add_many(self, items: Iterable[Tuple[int, Any]]) -> None:
+        items = list(items)
+        with self._lock:
+            self._add_many(items)
+
+    def _add_many(self, items: List[Tuple[int, Any]]) -> None:
+        # Whole column slices at a time; setting NumPy elements one by one
+        # costs far more than building the lists.
+        self._reserve(len(items))
+        start, end = self.size, self.size + len(items)
+        ids = [id for id, _ in items]
+        cars = [car for _, car in items]
+        self.id[start:end] = ids
+        self.year[start:end] = [car.year or 0 for car in cars]
+        self.price[start:end] = [
+            np.nan if car.price is None else car.price for car in cars
+        ]
+        self.make[start:end] = [self.makes.encode(car.make) for car in cars]
+        self.engine[start:end] = [
+            self.engines.encode(car.engine) for car in cars
+        ]
+        self.region[start:end] = [car.sold_mask for car in cars]
+        self.autonomous[start:end] = [bool(car.autonomous) for car in cars]
+        self._rows.update(zip(ids, range(start, end)))
+        self.size = end
+
+    def remove(self, id: int, car: Any) -> None:
+        with self._lock:
+            row = self._rows.pop(id)
+            last = self.size - 1
+            if row != last:
+                for name in (
+                    "id",
+                    "year",
+                    "price",
+                    "make",
+                    "engine",
+                    "region",
+                    "autonomous",
+                ):
+                    column = getattr(self, name)
+                    column[row] = column[last]
+                self._rows[int(self.id[row])] = row
+            self.size = last
+
+    def _read(self, *names: str) -> Tuple[np.ndarray, ...]:
+        with self._lock:
+            return tuple(
+                getattr(self, name)[: self.size].copy() for name in names
+            )
+
+    def price_percentiles(
+        self, percentiles: Sequence[float] = (25, 50, 75, 90)
+    ) -> Dict[str, Dict[str, float]]:
+        price, make = self._read("price", "make")
+        valid = ~np.isnan(price)
+        codes = make[valid]
+        prices = price[valid]
+
+        order = np.lexsort((prices, codes))
+        prices = prices[order]
+        counts = np.bincount(codes, minlength=len(self.makes))
+        starts = np.cumsum(counts) - counts
+
+        present = np.nonzero(counts)[0]
+        q = np.asarray(percentiles, dtype=np.float64) / 100
+        # Linear interpolation between closest ranks, as np.percentile does,
+        # computed for every make at once on the (make, price) sort order.
+        position = starts[present, None] + q[None, :] * (
+            counts[present, None] - 1
+        )
+        low = np.floor(position).astype(np.int64)
+        high = np.ceil(position).astype(np.int64)
+        values = prices[low] + (prices[high] - prices[low]) * (position - low)
+
+        return {
+            str(self.makes.values[code]): {
+                f"p{percentile:g}": float(value)
+                for percentile, value in zip(percentiles, row)
+            }
+            for code, row in zip(present, values)
+        }
+
+    def counts_by_year_and_engine(self) -> List[Dict[str, Any]]:
+        year, engine = self._read("year", "engine")
+        # Codes only ever grow, so any length read after the copy covers it.
+        engines = len(self.engines)
+        keys = year.astype(np.int64) * engines + engine
+        unique, counts = np.unique(keys, return_counts=True)
+
+        return [
+            {
+                "year": int(key // engines) or None,
+                "engine": self.engines.values[key % engines],
+                "count": int(count),
+            }
+            for key, count in zip(unique, counts)
+        ]
+
+    def autonomous_share_by_region(self) -> Dict[str, Dict[str, Any]]:
+        region, is_autonomous = self._read("region", "autonomous")
+        bits = np.unpackbits(region[:, None], axis=1, bitorder="little")[
+            :, : len(REGIONS)
+        ]
+        totals = bits.sum(axis=0)
+        autonomous = bits[is_autonomous].sum(axis=0)
+
+        return {
+            region: {
+                "cars": int(total),
+                "autonomous": int(count),
+                "share": float(count / total) if total else 0.0,
+            }
+            for region, total, count in zip(REGIONS, totals, autonomous)
+        }
@@ -0,0 +1,78 @@
+# Memory per stored car: pydantic Car models in a dict, as the store kept
+# them before CarRecord, against CarRecord in a CarStore.
+#
+#   python bench_records.py [sizes...]
+import gc
+import random
+import sys
+import tracemalloc
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from records import REGIONS, CarRecord
+from store import CarStore
+
+
+class Car(BaseModel):
+    # The fields of main.Car, without importing main and its data directory.
+    make: Optional[str]
+    model: Optional[str]
+    year: Optional[int]
+    price: Optional[float]
+    engine: Optional[str] = "V4"
+    autonomous: Optional[bool]
+    sold: Optional[List[str]]
+
+
+def random_rows(size: int, seed: int = 1):
+    rng = random.Random(seed)
+    for _ in range(size):
+        # Formatted per row, like strings parsed out of a request body.
+        yield {
+            "make": f"Make{rng.randrange(300)}",
+            "model": f"Model{rng.randrange(3000)}",
+            "year": rng.randint(1970, 2021),
+            "price": float(rng.randint(5_000, 250_000)),
+            "engine": rng.choice(("V4", "V6", "V8", "V12")),
+            "autonomous": rng.random() < 0.2,
+            "sold": rng.sample(REGIONS, rng.randint(0, 3)),
+        }
+
+
+def measure(build) -> int:
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    stored = build()
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del stored
+    return used
+
+
+def run(size: int) -> None:
+    before = measure(
+        lambda: {
+            id: Car(**row) for id, row in enumerate(random_rows(size), 1)
+        }
+    )
+    after = measure(
+        lambda: CarStore(
+            {
+                id: CarRecord.from_dict(row)
+                for id, row in enumerate(random_rows(size), 1)
+            }
+        )
+    )
+    print(
+        f"{size:>9,} cars  pydantic {before / size:6.0f} B/car  "
+        f"CarRecord {after / size:6.0f} B/car  ({before / after:.1f}x)"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or [100_000, 1_000_000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,79 @@
+# Cold-start time of the car store against dataset size: loading the
+# snapshot and log into a CarStore, then replaying it into the listeners
+# that database.py subscribes.
+#
+#   python bench_reload.py [sizes...]
+import os
+import random
+import sys
+import tempfile
+import time
+
+from analytics import CarColumns
+from indexes import CarIndex
+from persistence import CarLog
+from records import REGIONS, CarRecord, region_mask
+from store import CarStore
+from suggest import CarSuggestions
+
+MAKES = [f"Make{index}" for index in range(300)]
+MODELS = [f"Model{index}" for index in range(3000)]
+ENGINES = ("V4", "V6", "V8", "V12")
+
+
+def random_cars(size: int, seed: int = 1):
+    rng = random.Random(seed)
+    for id in range(1, size + 1):
+        yield id, CarRecord(
+            make=rng.choice(MAKES),
+            model=rng.choice(MODELS),
+            year=rng.randint(1970, 2021),
+            price=float(rng.randint(5_000, 250_000)),
+            engine=rng.choice(ENGINES),
+            autonomous=rng.random() < 0.2,
+            sold_mask=region_mask(rng.sample(REGIONS, rng.randint(0, 3))),
+        )
+
+
+def timed(action):
+    start = time.perf_counter()
+    result = action()
+    return result, time.perf_counter() - start
+
+
+def run(size: int, log_entries: int = 10_000) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        cars = CarStore()
+        cars.apply(random_cars(size))
+        log = CarLog(directory)
+        log.snapshot(cars)
+        # A tail of writes since the last snapshot, as after a normal run.
+        cars.subscribe(log, replay=False)
+        for id, car in random_cars(log_entries, seed=2):
+            cars[id] = car
+        log.close()
+        snapshot_size = os.path.getsize(log.snapshot_path)
+
+        store = CarStore()
+        log = CarLog(directory)
+        _, load = timed(lambda: log.load(store))
+        log.close()
+        replays = []
+        for listener in (CarIndex(), CarColumns(), CarSuggestions()):
+            _, elapsed = timed(lambda: store.subscribe(listener))
+            replays.append(f"{type(listener).__name__} {elapsed:.2f}s")
+
+        print(
+            f"{size:>9,} cars  snapshot {snapshot_size / 2**20:6.1f} MiB  "
+            f"load {load:.2f}s  " + "  ".join(replays)
+        )
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or [
+        10_000,
+        100_000,
+        1_000_000,
+    ]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,73 @@
+# Latency of /cars/suggest lookups against the number of cars: typed
+# prefixes of known makes and models, some with a typo, against a cold and
+# a warm cache and again after a burst of writes.
+#
+#   python bench_suggest.py [sizes...]
+import random
+import string
+import sys
+import time
+
+from records import CarRecord
+from suggest import CarSuggestions
+
+
+def random_word(rng: random.Random, low: int, high: int) -> str:
+    letters = string.ascii_lowercase
+    size = rng.randint(low, high)
+    return "".join(rng.choice(letters) for _ in range(size)).title()
+
+
+def percentiles(suggestions: CarSuggestions, queries) -> str:
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        suggestions.suggest(query)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    return f"p50 {p50:.3f}ms p99 {p99:.3f}ms"
+
+
+def run(size: int, seed: int = 1) -> None:
+    rng = random.Random(seed)
+    makes = [random_word(rng, 4, 10) for _ in range(300)]
+    models = [random_word(rng, 3, 12) for _ in range(3000)]
+    items = [
+        (
+            id,
+            CarRecord(
+                rng.choice(makes), rng.choice(models), 2000, 1.0, "V4", False
+            ),
+        )
+        for id in range(size)
+    ]
+    suggestions = CarSuggestions()
+    start = time.perf_counter()
+    suggestions.add_many(items)
+    load = time.perf_counter() - start
+
+    queries = []
+    for _ in range(5000):
+        query = rng.choice(makes + models)[: rng.randint(1, 8)]
+        if len(query) > 3 and rng.random() < 0.3:
+            query = query[:-1] + "x"
+        queries.append(query)
+
+    cold = percentiles(suggestions, queries)
+    warm = percentiles(suggestions, queries)
+    for id, car in items[:1000]:
+        suggestions.remove(id, car)
+        suggestions.add(id, car)
+    written = percentiles(suggestions, queries)
+    print(
+        f"{size:>9,} cars  load {load:.2f}s  cold {cold}  warm {warm}  "
+        f"after 1000 writes {written}"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or [100_000, 1_000_000]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,80 @@
+import codecs
+import json
+from typing import Any, AsyncIterator, List, Tuple
+
+_decoder = json.JSONDecoder()
+_SEPARATORS = " \t\r\n,"
+
+
+def _drain_array(buffer: str, final: bool) -> Tuple[List[Any], str, bool]:
+    rows = []
+    pos = 0
+    done = False
+    while True:
+        while pos < len(buffer) and buffer[pos] in _SEPARATORS:
+            pos += 1
+        if pos >= len(buffer):
+            break
+        if buffer[pos] == "]":
+            done = True
+            pos += 1
+            break
+        try:
+            value, pos_end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Most likely a row split across chunks; wait for more data.
+            if final:
+                raise
+            break
+        if pos_end == len(buffer) and not final:
+            # A number can run on into the next chunk, so hold it back.
+            break
+        rows.append(value)
+        pos = pos_end
+
+    return rows, buffer[pos:], done
+
+
+async def iter_json_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    # Yields rows from either a JSON array or an NDJSON body as the bytes
+    # arrive, without buffering the whole request.
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    mode = None
+
+    async for chunk in chunks:
+        buffer += text.decode(chunk)
+        if mode is None:
+            buffer = buffer.lstrip()
+            if not buffer:
+                continue
+            if buffer[0] == "[":
+                mode = "array"
+                buffer = buffer[1:]
+            else:
+                mode = "ndjson"
+
+        if mode == "ndjson":
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+        elif mode == "array":
+            rows, buffer, done = _drain_array(buffer, final=False)
+            for row in rows:
+                yield row
+            if done:
+                mode = "closed"
+
+    buffer += text.decode(b"", final=True)
+    if mode == "ndjson":
+        if buffer.strip():
+            yield json.loads(buffer)
+    elif mode == "array":
+        rows, buffer, done = _drain_array(buffer, final=True)
+        for row in rows:
+            yield row
+        if not done:
+            raise ValueError("Unterminated JSON array.")
+    if mode == "closed" and buffer.strip():
+        raise ValueError("Unexpected data after JSON array.")
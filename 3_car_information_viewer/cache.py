@@ -0,0 +1,77 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Iterable, Optional, Tuple
+
+# Versions restart from zero on every boot, so ETags also carry a per-process
+# token; otherwise a restarted server could reuse a tag for different bytes.
+_BOOT_TOKEN = os.urandom(8).hex()
+
+
+class CarVersions:
+    # Store listener that bumps a global version on every write and a
+    # per-car version for each id touched.
+    def __init__(self):
+        self.version = 0
+        self._ids: Dict[int, int] = {}
+
+    def of(self, id: int) -> int:
+        return self._ids.get(id, 0)
+
+    def add(self, id: int, car: Any) -> None:
+        self.version += 1
+        self._ids[id] = self._ids.get(id, 0) + 1
+
+    def remove(self, id: int, car: Any) -> None:
+        self.add(id, car)
+
+    def add_many(self, items: Iterable[Tuple[int, Any]]) -> None:
+        for id, car in items:
+            self.add(id, car)
+
+
+def make_etag(key: Hashable) -> str:
+    digest = hashlib.blake2b(
+        f"{_BOOT_TOKEN}:{key!r}".encode(), digest_size=16
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+class PageCache:
+    # Bounded LRU of rendered pages. Keys embed the store versions they were
+    # rendered against, so a write makes stale entries unreachable and they
+    # simply age out.
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._pages: "OrderedDict[Hashable, Tuple[str, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Tuple[str, int]]:
+        with self._lock:
+            page = self._pages.get(key)
+            if page is None:
+                self.misses += 1
+                return None
+            self._pages.move_to_end(key)
+            self.hits += 1
+            return page
+
+    def put(self, key: Hashable, body: str, status_code: int) -> None:
+        with self._lock:
+            self._pages[key] = (body, status_code)
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.maxsize:
+                self._pages.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._pages),
+            "maxsize": self.maxsize,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
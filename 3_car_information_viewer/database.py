@@ -1,4 +1,14 @@
-cars = {
+import os
+
+from analytics import CarColumns
+from cache import CarVersions
+from indexes import CarIndex
+from persistence import CarLog
+from records import CarRecord
+from store import CarStore
+from suggest import CarSuggestions
+
+SEED_CARS = {
     1: {
         "make": "CarBrand",
         "model": "Fast",
@@ -48,4 +58,22 @@ cars = {
         "autonomous": False,
         "sold": ["NA","AF","OC","SA"]
     }
-}
\ No newline at end of file
+}
+
+cars = CarStore()
+car_log = CarLog(os.environ.get("CARS_DATA_DIR", "data"))
+if not car_log.load(cars):
+    cars.apply(
+        (id, CarRecord.from_dict(car)) for id, car in SEED_CARS.items()
+    )
+    car_log.snapshot(cars)
+
+car_index = CarIndex()
+cars.subscribe(car_index)
+car_suggestions = CarSuggestions()
+cars.subscribe(car_suggestions)
+car_columns = CarColumns()
+cars.subscribe(car_columns)
+car_versions = CarVersions()
+cars.subscribe(car_versions, replay=False)
+cars.subscribe(car_log, replay=False)
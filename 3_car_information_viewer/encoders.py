@@ -0,0 +1,84 @@
+import json
+import math
+from functools import lru_cache
+from json.encoder import encode_basestring
+from typing import Callable, Iterable, Optional, Tuple
+
+from records import REGIONS, CarRecord, region_list
+
+FIELDS = CarRecord.FIELDS
+
+# Every possible sold bitmask, already encoded.
+_SOLD = [
+    json.dumps(region_list(mask), separators=(",", ":"))
+    for mask in range(1 << len(REGIONS))
+]
+
+
+def _text(value: Optional[str]) -> str:
+    return "null" if value is None else encode_basestring(value)
+
+
+def _number(value) -> str:
+    # NaN and infinities have no JSON spelling.
+    if value is None or not math.isfinite(value):
+        return "null"
+    return repr(value)
+
+
+def _flag(value: Optional[bool]) -> str:
+    if value is None:
+        return "null"
+    return "true" if value else "false"
+
+
+_WRITERS = {
+    "make": lambda car: _text(car.make),
+    "model": lambda car: _text(car.model),
+    "year": lambda car: _number(car.year),
+    "price": lambda car: _number(car.price),
+    "engine": lambda car: _text(car.engine),
+    "autonomous": lambda car: _flag(car.autonomous),
+    "sold": lambda car: _SOLD[car.sold_mask],
+}
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    if not fields:
+        return FIELDS
+    selected = tuple(field.strip() for field in fields.split(","))
+    unknown = [field for field in selected if field not in _WRITERS]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+
+@lru_cache(maxsize=128)
+def record_encoder(
+    fields: Tuple[str, ...] = FIELDS
+) -> Callable[[int, CarRecord], str]:
+    # Builds a CarRecord -> JSON object encoder for one field projection.
+    # Keys are encoded once here; per car only the values are formatted.
+    writers = [
+        (f",{encode_basestring(field)}:", _WRITERS[field]) for field in fields
+    ]
+
+    def encode(id: int, car: CarRecord) -> str:
+        parts = ['{"id":', str(id)]
+        for key, write in writers:
+            parts.append(key)
+            parts.append(write(car))
+        parts.append("}")
+        return "".join(parts)
+
+    return encode
+
+
+def encode_cars(
+    cars: Iterable[Tuple[int, CarRecord]],
+    fields: Tuple[str, ...] = FIELDS,
+    next_cursor: Optional[str] = None,
+) -> str:
+    encode = record_encoder(fields)
+    body = ",".join(encode(id, car) for id, car in cars)
+    return f'{{"cars":[{body}],"next":{_text(next_cursor)}}}'
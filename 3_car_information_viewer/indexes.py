@@ -0,0 +1,220 @@
+import threading
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+HASH_FIELDS = ("make", "engine")
+SORTED_FIELDS = ("year", "price")
+
+
+def _key(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return str(value).lower()
+
+
+class CarIndex:
+    # Secondary indexes over the car store: hash indexes for make, engine
+    # and sold region, sorted (value, id) lists for year and price. They
+    # have a lock of their own, so searches do not wait for the store's
+    # write lock and everything else that runs under it.
+    def __init__(self):
+        self._hash: Dict[str, Dict[str, Set[int]]] = {
+            field: defaultdict(set) for field in HASH_FIELDS + ("region",)
+        }
+        self._sorted: Dict[str, List[Tuple[Any, int]]] = {
+            field: [] for field in SORTED_FIELDS
+        }
+        self._values: Dict[str, Dict[int, Any]] = {
+            field: {} for field in SORTED_FIELDS
+        }
+        self._lock = threading.Lock()
+
+    def _hash_keys(self, car: Any) -> List[Tuple[str, str]]:
+        keys = [
+            (field, _key(getattr(car, field)))
+            for field in HASH_FIELDS
+            if getattr(car, field) is not None
+        ]
+        keys.extend(("region", _key(region)) for region in car.sold)
+        return keys
+
+    def add(self, id: int, car: Any) -> None:
+        with self._lock:
+            self._add(id, car)
+
+    def update(self, id: int, old: Any, car: Any) -> None:
+        # One step, so a search never sees the car missing midway.
+        with self._lock:
+            self._remove(id, old)
+            self._add(id, car)
+
+    def remove(self, id: int, car: Any) -> None:
+        with self._lock:
+            self._remove(id, car)
+
+    def _add(self, id: int, car: Any) -> None:
+        for field, key in self._hash_keys(car):
+            self._hash[field][key].add(id)
+
+        for field in SORTED_FIELDS:
+            value = getattr(car, field)
+            if value is None:
+                continue
+            insort(self._sorted[field], (value, id))
+            self._values[field][id] = value
+
+    def add_many(self, items: Iterable[Tuple[int, Any]]) -> None:
+        items = list(items)
+        with self._lock:
+            if len(items) < 64:
+                for id, car in items:
+                    self._add(id, car)
+            else:
+                self._add_many(items)
+
+    def _add_many(self, items: List[Tuple[int, Any]]) -> None:
+        # Makes, engines and region sets repeat a lot, so their keys and
+        # index buckets are looked up once per distinct value, not per car.
+        buckets: Dict[Tuple[str, Any], Set[int]] = {}
+        region_buckets: Dict[int, List[Set[int]]] = {}
+        hashes = [(field, self._hash[field]) for field in HASH_FIELDS]
+        regions_index = self._hash["region"]
+        sorted_fields = [
+            (field, self._sorted[field].append, self._values[field])
+            for field in SORTED_FIELDS
+        ]
+        for id, car in items:
+            for field, index in hashes:
+                value = getattr(car, field)
+                if value is None:
+                    continue
+                bucket = buckets.get((field, value))
+                if bucket is None:
+                    bucket = buckets[(field, value)] = index[_key(value)]
+                bucket.add(id)
+            regions = region_buckets.get(car.sold_mask)
+            if regions is None:
+                regions = region_buckets[car.sold_mask] = [
+                    regions_index[_key(region)] for region in car.sold
+                ]
+            for bucket in regions:
+                bucket.add(id)
+
+            for field, append, values in sorted_fields:
+                value = getattr(car, field)
+                if value is not None:
+                    append((value, id))
+                    values[id] = value
+
+        # Two stable key sorts give (value, id) order, and are much cheaper
+        # than comparing the tuples themselves.
+        for field in SORTED_FIELDS:
+            self._sorted[field].sort(key=itemgetter(1))
+            self._sorted[field].sort(key=itemgetter(0))
+
+    def _remove(self, id: int, car: Any) -> None:
+        for field, key in self._hash_keys(car):
+            ids = self._hash[field].get(key)
+            if ids is None:
+                continue
+            ids.discard(id)
+            if not ids:
+                del self._hash[field][key]
+
+        for field in SORTED_FIELDS:
+            value = self._values[field].pop(id, None)
+            if value is None:
+                continue
+            entries = self._sorted[field]
+            index = bisect_left(entries, (value, id))
+            del entries[index]
+
+    def _range(self, field: str, low: Any, high: Any) -> Tuple[int, int]:
+        entries = self._sorted[field]
+        start = 0 if low is None else bisect_left(entries, (low, -1))
+        end = (
+            len(entries)
+            if high is None
+            else bisect_right(entries, (high, float("inf")))
+        )
+        return start, max(start, end)
+
+    def search(
+        self,
+        make: Optional[str] = None,
+        engine: Optional[str] = None,
+        region: Optional[str] = None,
+        min_year: Optional[int] = None,
+        max_year: Optional[int] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+    ) -> List[int]:
+        with self._lock:
+            return self._search(
+                make, engine, region, min_year, max_year, min_price, max_price
+            )
+
+    def _search(
+        self,
+        make: Optional[str],
+        engine: Optional[str],
+        region: Optional[str],
+        min_year: Optional[int],
+        max_year: Optional[int],
+        min_price: Optional[float],
+        max_price: Optional[float],
+    ) -> List[int]:
+        hash_sets = []
+        for field, value in (
+            ("make", make),
+            ("engine", engine),
+            ("region", region),
+        ):
+            if value is not None:
+                hash_sets.append(self._hash[field].get(_key(value), set()))
+
+        ranges = {}
+        for field, low, high in (
+            ("year", min_year, max_year),
+            ("price", min_price, max_price),
+        ):
+            if low is not None or high is not None:
+                ranges[field] = (low, high, self._range(field, low, high))
+
+        if not hash_sets and not ranges:
+            return []
+
+        # Materialise only the most selective predicate, then probe the rest.
+        # Range sizes come straight from the bisect bounds, so this never
+        # scans the store.
+        predicates = [(len(ids), ids, None) for ids in hash_sets]
+        predicates.extend(
+            (end - start, None, field)
+            for field, (_, _, (start, end)) in ranges.items()
+        )
+        _, driver_set, driver_field = min(predicates, key=lambda p: p[0])
+
+        if driver_field is not None:
+            start, end = ranges[driver_field][2]
+            result = {id for _, id in self._sorted[driver_field][start:end]}
+        else:
+            result = set(driver_set)
+
+        for ids in hash_sets:
+            if ids is not driver_set:
+                result &= ids
+        for field, (low, high, _) in ranges.items():
+            if field == driver_field:
+                continue
+            values = self._values[field]
+            result = {
+                id
+                for id in result
+                if id in values
+                and (low is None or values[id] >= low)
+                and (high is None or values[id] <= high)
+            }
+
+        return sorted(result)
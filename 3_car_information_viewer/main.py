@@ -1,7 +1,7 @@
-from typing import Dict, List, Optional
+from bisect import bisect_right
+from typing import Callable, Dict, List, Optional, Tuple
 
 from fastapi import (
-    Body,
     FastAPI,
     Form,
     HTTPException,
@@ -10,18 +10,36 @@ from fastapi import (
     Request,
     status,
 )
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from pydantic import BaseModel, Field
-from starlette.responses import HTMLResponse
+from pydantic import BaseModel, Field, ValidationError, validator
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import HTMLResponse, Response
 from starlette.status import HTTP_400_BAD_REQUEST
 
-from database import cars
+from bulk import iter_json_rows
+from cache import PageCache, make_etag
+from database import (
+    car_columns,
+    car_index,
+    car_log,
+    car_suggestions,
+    car_versions,
+    cars,
+)
+from encoders import encode_cars, parse_fields, record_encoder
+from records import REGIONS, CarRecord
+from store import PageIterator, decode_cursor, encode_cursor
+from suggest import MAX_SUGGESTIONS
 
 templates = Jinja2Templates(directory="templates")
 
+STREAM_CHUNK_SIZE = 16 * 1024
+# Rendered pages are cached whole, so only streamed listings may be large.
+MAX_CACHED_PAGE_SIZE = 999
+MAX_STREAMED_PAGE_SIZE = 999_999
+
 
 class Car(BaseModel):
     make: Optional[str]
@@ -32,51 +50,353 @@ class Car(BaseModel):
     autonomous: Optional[bool]
     sold: Optional[List[str]]
 
+    @validator("sold", each_item=True)
+    def check_region(cls, region):
+        if region not in REGIONS:
+            raise ValueError(f"region must be one of {', '.join(REGIONS)}")
+        return region
+
 
 app = FastAPI()
+page_cache = PageCache(maxsize=1024)
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
+@app.on_event("shutdown")
+def close_car_log():
+    car_log.close()
+
+
+def parse_cursor(cursor: Optional[str]) -> Optional[int]:
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor."
+        )
+
+
+def next_url(request: Request, cursor: Optional[str]) -> Optional[str]:
+    if not cursor:
+        return None
+    return str(request.url.include_query_params(after=cursor))
+
+
+class NextUrl:
+    # Link to the page after a streamed one. The template reads it after
+    # its loop over the cars, by which point the page iterator knows
+    # whether there is a next page.
+    def __init__(self, request: Request, page: PageIterator):
+        self.request = request
+        self.page = page
+
+    def __bool__(self) -> bool:
+        return self.page.next_cursor is not None
+
+    def __str__(self) -> str:
+        return next_url(self.request, self.page.next_cursor) or ""
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match", "")
+    return etag in [tag.strip() for tag in if_none_match.split(",")]
+
+
+def cached_page(
+    request: Request,
+    key: tuple,
+    template: str,
+    build: Callable[[], Tuple[dict, int]],
+) -> Response:
+    # Rendered pages embed absolute static URLs, so the host is part of the
+    # key too.
+    key = (str(request.base_url),) + key
+    etag = make_etag(key)
+    if is_not_modified(request, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+
+    page = page_cache.get(key)
+    if page is None:
+        context, status_code = build()
+        body = templates.get_template(template).render(
+            {"request": request, **context}
+        )
+        page_cache.put(key, body, status_code)
+        page = (body, status_code)
+
+    body, status_code = page
+    headers = {"ETag": etag} if status_code == status.HTTP_200_OK else None
+    return HTMLResponse(body, status_code=status_code, headers=headers)
+
+
+def streamed_page(
+    request: Request, template: str, context: dict
+) -> StreamingResponse:
+    # Renders the template as it is iterated and sends it in chunks, so
+    # neither the full list of cars nor the full page is held in memory.
+    events = templates.get_template(template).generate(
+        {"request": request, **context}
+    )
+
+    def chunks():
+        buffer = []
+        size = 0
+        for event in events:
+            buffer.append(event)
+            size += len(event)
+            if size >= STREAM_CHUNK_SIZE:
+                yield "".join(buffer)
+                buffer = []
+                size = 0
+        if buffer:
+            yield "".join(buffer)
+
+    return StreamingResponse(chunks(), media_type="text/html")
+
+
+@app.get("/cache/stats")
+def get_cache_stats():
+    return page_cache.stats()
+
+
+def json_response(request: Request, key: tuple, encode: Callable[[], str]):
+    etag = make_etag(key)
+    if is_not_modified(request, etag):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+        )
+
+    return Response(
+        encode(), media_type="application/json", headers={"ETag": etag}
+    )
+
+
+def parse_field_list(fields: Optional[str]) -> Tuple[str, ...]:
+    try:
+        return parse_fields(fields)
+    except ValueError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=str(error)
+        )
+
+
+@app.get("/api/cars")
+async def api_get_cars(
+    request: Request,
+    fields: Optional[str] = Query(None),
+    number: int = Query(10, ge=1, le=1000),
+    after: Optional[str] = Query(None),
+):
+    selected = parse_field_list(fields)
+    after_id = parse_cursor(after)
+    snapshot = cars.snapshot()
+
+    def encode():
+        response, next_cursor = snapshot.page(after=after_id, number=number)
+        return encode_cars(response, selected, next_cursor)
+
+    return json_response(
+        request,
+        ("api-cars", selected, number, after_id, snapshot.version),
+        encode,
+    )
+
+
+@app.get("/api/cars/{id}")
+async def api_get_car(
+    request: Request, id: int = Path(...), fields: Optional[str] = Query(None)
+):
+    selected = parse_field_list(fields)
+    # Writers publish the car before bumping its version, so reading the
+    # version first can only pair it with a newer body, never an older one.
+    version = car_versions.of(id)
+    car = cars.get(id)
+    if car is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Car not found."
+        )
+
+    return json_response(
+        request,
+        ("api-car", id, selected, version),
+        lambda: record_encoder(selected)(id, car),
+    )
+
+
 @app.get("/", response_class=RedirectResponse)
 def root(request: Request):
     return RedirectResponse(url="/cars")
 
 
 @app.get("/cars", response_class=HTMLResponse)
-def get_cars(
-    request: Request, number: Optional[str] = Query("10", max_length=3)
+async def get_cars(
+    request: Request,
+    number: int = Query(10, ge=1, le=MAX_STREAMED_PAGE_SIZE),
+    after: Optional[str] = Query(None),
+    stream: bool = Query(False),
 ):
-    response = []
-    for id, car in list(cars.items())[: int(number)]:
-        response.append((id, car))
+    after_id = parse_cursor(after)
+    snapshot = cars.snapshot()
+
+    if stream:
+        page = snapshot.iter_page(after=after_id, number=number)
+        return streamed_page(
+            request,
+            "index.html",
+            {
+                "cars": page,
+                "next_url": NextUrl(request, page),
+                "title": "Home",
+            },
+        )
 
-    return templates.TemplateResponse(
-        "index.html", {"request": request, "cars": response, "title": "Home"}
+    if number > MAX_CACHED_PAGE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                f"number above {MAX_CACHED_PAGE_SIZE} requires stream=true."
+            ),
+        )
+
+    def build():
+        response, next_cursor = snapshot.page(after=after_id, number=number)
+        return {
+            "cars": response,
+            "next_url": next_url(request, next_cursor),
+            "title": "Home",
+        }, status.HTTP_200_OK
+
+    return cached_page(
+        request,
+        ("cars", number, after_id, snapshot.version),
+        "index.html",
+        build,
     )
 
 
-@app.get("/cars/{id}", response_class=HTMLResponse)
-def get_car_by_id(request: Request, id: int = Path(..., ge=0, lt=1000)):
-    car = cars.get(id)
-    response = templates.TemplateResponse(
-        "search.html",
-        {"request": request, "car": car, "id": id, "title": "Search Car"},
+@app.get("/cars/search", response_class=HTMLResponse)
+def search_cars_by_fields(
+    request: Request,
+    make: Optional[str] = Query(None),
+    engine: Optional[str] = Query(None),
+    region: Optional[str] = Query(None, max_length=2),
+    min_year: Optional[int] = Query(None),
+    max_year: Optional[int] = Query(None),
+    min_price: Optional[float] = Query(None),
+    max_price: Optional[float] = Query(None),
+    number: int = Query(10, ge=1, le=MAX_CACHED_PAGE_SIZE),
+    after: Optional[str] = Query(None),
+):
+    after_id = parse_cursor(after)
+    filters = {
+        "make": make,
+        "engine": engine,
+        "region": region,
+        "min_year": min_year,
+        "max_year": max_year,
+        "min_price": min_price,
+        "max_price": max_price,
+    }
+
+    snapshot = cars.snapshot()
+
+    def build():
+        if all(value is None for value in filters.values()):
+            # No filters: every car matches, in store order.
+            response, next_cursor = snapshot.page(
+                after=after_id, number=number
+            )
+            return {
+                "cars": response,
+                "next_url": next_url(request, next_cursor),
+                "title": "Search Cars",
+            }, status.HTTP_200_OK
+
+        # The index may have moved on since the snapshot was taken, so ids
+        # it no longer holds are skipped.
+        ids = car_index.search(**filters)
+        start = 0 if after_id is None else bisect_right(ids, after_id)
+        page = ids[start : start + number]
+        response = [(id, snapshot[id]) for id in page if id in snapshot]
+
+        next_cursor = None
+        if page and start + number < len(ids):
+            next_cursor = encode_cursor(page[-1])
+
+        return {
+            "cars": response,
+            "next_url": next_url(request, next_cursor),
+            "title": "Search Cars",
+        }, status.HTTP_200_OK
+
+    return cached_page(
+        request,
+        (
+            "search",
+            *filters.values(),
+            number,
+            after_id,
+            snapshot.version,
+        ),
+        "index.html",
+        build,
     )
-    if not car:
-        response.status_code = status.HTTP_404_NOT_FOUND
 
-    return response
+
+@app.get("/cars/suggest")
+def suggest_cars(
+    q: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS),
+):
+    return car_suggestions.suggest(q, limit=limit)
+
+
+@app.get("/cars/stats/prices")
+def get_price_stats(q: List[float] = Query([25, 50, 75, 90])):
+    if any(not 0 <= percentile <= 100 for percentile in q):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Percentiles must be between 0 and 100.",
+        )
+
+    return car_columns.price_percentiles(q)
+
+
+@app.get("/cars/stats/counts")
+def get_count_stats():
+    return car_columns.counts_by_year_and_engine()
+
+
+@app.get("/cars/stats/autonomous")
+def get_autonomous_stats():
+    return car_columns.autonomous_share_by_region()
+
+
+@app.get("/cars/{id}", response_class=HTMLResponse)
+async def get_car_by_id(request: Request, id: int = Path(..., ge=0)):
+    def build():
+        car = cars.get(id)
+        status_code = status.HTTP_200_OK if car else status.HTTP_404_NOT_FOUND
+        return {"car": car, "id": id, "title": "Search Car"}, status_code
+
+    return cached_page(
+        request, ("car", id, car_versions.of(id)), "search.html", build
+    )
 
 
 @app.get("/create", response_class=HTMLResponse)
-def create_car(request: Request):
+async def create_car(request: Request):
     return templates.TemplateResponse(
         "create.html", {"request": request, "title": "Create Car"}
     )
 
 
 @app.get("/edit", response_class=HTMLResponse)
-def edit_car(request: Request, id: int = Query(...)):
+async def edit_car(request: Request, id: int = Query(...)):
     car = cars.get(id)
     if not car:
         return templates.TemplateResponse(
@@ -100,7 +420,11 @@ def delete_car(request: Request, id: int = Path(...)):
             status_code=status.HTTP_404_NOT_FOUND,
         )
 
-    del cars[id]
+    try:
+        del cars[id]
+    except KeyError:
+        # Deleted by a concurrent request; the outcome is the same.
+        pass
 
     return RedirectResponse(url="/cars", status_code=302)
 
@@ -119,7 +443,6 @@ def add_cars(
     engine: Optional[str] = Form(...),
     autonomous: Optional[bool] = Form(...),
     sold: Optional[List[str]] = Form(None),
-    min_id: Optional[int] = Body(0),
 ):
     body_cars = [
         Car(
@@ -137,16 +460,48 @@ def add_cars(
             status_code=status.HTTP_400_BAD_REQUEST, detail="No cars to add."
         )
 
-    min_id = len(cars.values()) + min_id
-    for car in body_cars:
-        while cars.get(min_id):
-            min_id += 1
-        cars[min_id] = car
-        min_id += 1
+    cars.add_many(CarRecord.from_dict(car.dict()) for car in body_cars)
 
     return RedirectResponse(url="/cars", status_code=302)
 
 
+@app.post("/cars/bulk", status_code=status.HTTP_201_CREATED)
+async def add_cars_bulk(
+    request: Request, batch_size: int = Query(1000, ge=1, le=10000)
+):
+    valid = []
+    errors = []
+    batch = []
+
+    def validate(batch):
+        for row, data in batch:
+            try:
+                valid.append(CarRecord.from_dict(Car.parse_obj(data).dict()))
+            except ValidationError as error:
+                errors.append({"row": row, "errors": error.errors()})
+
+    row = 0
+    try:
+        async for data in iter_json_rows(request.stream()):
+            batch.append((row, data))
+            row += 1
+            if len(batch) >= batch_size:
+                await run_in_threadpool(validate, batch)
+                batch = []
+    except ValueError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Malformed JSON after row {row}: {error}",
+        )
+    await run_in_threadpool(validate, batch)
+
+    # add_many waits for write_lock and runs every listener, the log's
+    # fsyncs and any compaction, so keep it off the event loop.
+    ids = await run_in_threadpool(cars.add_many, valid)
+
+    return {"inserted": len(ids), "ids": ids, "errors": errors}
+
+
 @app.post("/cars/{id}")
 def update_car(
     request: Request,
@@ -167,7 +522,6 @@ def update_car(
             status_code=status.HTTP_404_NOT_FOUND,
         )
 
-    stored = Car(**dict(stored))
     car = Car(
         make=make,
         model=model,
@@ -178,9 +532,13 @@ def update_car(
         sold=sold,
     )
     new = car.dict(exclude_unset=True)
-    new = stored.copy(update=new)
-    cars[id] = jsonable_encoder(new)
-    response = {}
-    response[id] = cars[id]
+    try:
+        cars.modify(id, lambda stored: stored.replace(**new))
+    except KeyError:
+        return templates.TemplateResponse(
+            "search.html",
+            {"request": request, "car": None, "id": id, "title": "Edit Car"},
+            status_code=status.HTTP_404_NOT_FOUND,
+        )
 
     return RedirectResponse(url="/cars", status_code=302)
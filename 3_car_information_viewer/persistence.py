@@ -0,0 +1,157 @@
+import atexit
+import json
+import marshal
+import os
+import threading
+from typing import Any, Optional
+
+from records import CarRecord
+
+SNAPSHOT_MAGIC = b"CARSNAP2"
+
+
+def _pack(id: int, car: CarRecord) -> tuple:
+    return (id,) + car.to_tuple()
+
+
+def _unpack(row: tuple) -> CarRecord:
+    return CarRecord.from_tuple(row[1:])
+
+
+class CarLog:
+    # Append-only mutation log plus a compact marshal snapshot. Writes are
+    # appended to the log and fsynced in batches (or every sync_interval
+    # seconds, whichever comes first); once the log grows past
+    # compact_every entries the store is snapshotted and the log truncated.
+    def __init__(
+        self,
+        directory: str,
+        batch_size: int = 256,
+        sync_interval: float = 1.0,
+        compact_every: int = 100_000,
+    ):
+        os.makedirs(directory, exist_ok=True)
+        self.snapshot_path = os.path.join(directory, "cars.snapshot")
+        self.log_path = os.path.join(directory, "cars.log")
+        self.batch_size = batch_size
+        self.sync_interval = sync_interval
+        self.compact_every = compact_every
+
+        self._store: Optional[Any] = None
+        self._lock = threading.Lock()
+        self._file = open(self.log_path, "a", encoding="utf-8")
+        self._pending = 0
+        self._entries = 0
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def load(self, store: Any) -> bool:
+        self._store = store
+        found = False
+
+        if os.path.exists(self.snapshot_path):
+            found = True
+            with open(self.snapshot_path, "rb") as file:
+                if file.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                    raise ValueError(
+                        f"{self.snapshot_path} is not a car snapshot."
+                    )
+                rows = marshal.loads(file.read())
+            # Snapshots are written in id order, so the store can take the
+            # rows as they are.
+            store.restore((row[0], _unpack(row)) for row in rows)
+
+        if os.path.exists(self.log_path):
+            ops = []
+            good = 0
+            with open(self.log_path, "rb") as file:
+                for line in file:
+                    try:
+                        if not line.endswith(b"\n"):
+                            raise ValueError("Unterminated log entry")
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash mid-append.
+                        break
+                    good += len(line)
+                    found = True
+                    self._entries += 1
+                    if entry["op"] == "put":
+                        car = CarRecord.from_dict(entry["car"])
+                    else:
+                        car = None
+                    ops.append((entry["id"], car))
+            store.apply(ops)
+
+            # Cut the torn tail off, or the next append would be glued onto
+            # it and lost along with it on the following load.
+            with self._lock:
+                self._file.flush()
+                if os.path.getsize(self.log_path) > good:
+                    os.truncate(self.log_path, good)
+
+        return found
+
+    def snapshot(self, store: Any) -> None:
+        self._store = store
+        with self._lock:
+            rows = [_pack(id, car) for id, car in store.items()]
+            tmp_path = self.snapshot_path + ".tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(SNAPSHOT_MAGIC)
+                marshal.dump(rows, file)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.snapshot_path)
+
+            self._file.close()
+            self._file = open(self.log_path, "w", encoding="utf-8")
+            self._pending = 0
+            self._entries = 0
+
+    def _append(self, entry: dict) -> None:
+        with self._lock:
+            self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            self._pending += 1
+            self._entries += 1
+            if self._pending >= self.batch_size:
+                self._sync()
+            compact = self._entries >= self.compact_every
+
+        if compact and self._store is not None:
+            self.snapshot(self._store)
+
+    def _sync(self) -> None:
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+
+    def _flush_loop(self) -> None:
+        while not self._closed.wait(self.sync_interval):
+            with self._lock:
+                if self._pending:
+                    self._sync()
+
+    def add(self, id: int, car: Any) -> None:
+        self._append({"op": "put", "id": id, "car": car.to_dict()})
+
+    def update(self, id: int, old: Any, car: Any) -> None:
+        # One record, so a crash cannot leave the car deleted.
+        self.add(id, car)
+
+    def remove(self, id: int, car: Any) -> None:
+        self._append({"op": "del", "id": id})
+
+    def flush(self) -> None:
+        with self._lock:
+            self._sync()
+
+    def close(self) -> None:
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        with self._lock:
+            self._sync()
+            self._file.close()
@@ -0,0 +1,112 @@
+import sys
+from typing import Any, Dict, Iterable, List, Optional
+
+REGIONS = ("AF", "AN", "AS", "EU", "NA", "OC", "SA")
+_REGION_BITS = {region: 1 << bit for bit, region in enumerate(REGIONS)}
+
+
+def region_mask(sold: Optional[Iterable[str]]) -> int:
+    mask = 0
+    for region in sold or ():
+        try:
+            mask |= _REGION_BITS[region]
+        except KeyError:
+            raise ValueError(f"Unknown region: {region!r}")
+    return mask
+
+
+def region_list(mask: int) -> List[str]:
+    return [region for region, bit in _REGION_BITS.items() if mask & bit]
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return None if value is None else sys.intern(value)
+
+
+class CarRecord:
+    # The single in-memory representation of a stored car. Repeated strings
+    # are interned and the sold regions are packed into a bitmask; the
+    # pydantic Car model is only used at the HTTP boundary.
+    __slots__ = (
+        "make",
+        "model",
+        "year",
+        "price",
+        "engine",
+        "autonomous",
+        "sold_mask",
+    )
+
+    FIELDS = ("make", "model", "year", "price", "engine", "autonomous", "sold")
+
+    def __init__(
+        self,
+        make: Optional[str],
+        model: Optional[str],
+        year: Optional[int],
+        price: Optional[float],
+        engine: Optional[str],
+        autonomous: Optional[bool],
+        sold_mask: int = 0,
+    ):
+        self.make = _intern(make)
+        self.model = _intern(model)
+        self.year = year
+        self.price = price
+        self.engine = _intern(engine)
+        self.autonomous = autonomous
+        self.sold_mask = sold_mask
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CarRecord":
+        return cls(
+            make=data.get("make"),
+            model=data.get("model"),
+            year=data.get("year"),
+            price=data.get("price"),
+            engine=data.get("engine"),
+            autonomous=data.get("autonomous"),
+            sold_mask=region_mask(data.get("sold")),
+        )
+
+    @property
+    def sold(self) -> List[str]:
+        return region_list(self.sold_mask)
+
+    def __getitem__(self, field: str) -> Any:
+        # Lets templates and store listeners keep reading car["make"].
+        if field not in self.FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __repr__(self) -> str:
+        return f"CarRecord({self.to_dict()!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: self[field] for field in self.FIELDS}
+
+    def to_tuple(self) -> tuple:
+        return tuple(getattr(self, field) for field in self.__slots__)
+
+    @classmethod
+    def from_tuple(cls, row: tuple) -> "CarRecord":
+        # Rows come from to_tuple(), so the strings are already interned
+        # (marshal keeps them that way) and __init__ can be skipped.
+        record = cls.__new__(cls)
+        (
+            record.make,
+            record.model,
+            record.year,
+            record.price,
+            record.engine,
+            record.autonomous,
+            record.sold_mask,
+        ) = row
+        return record
+
+    def replace(self, **changes: Any) -> "CarRecord":
+        values = {field: getattr(self, field) for field in self.__slots__}
+        if "sold" in changes:
+            values["sold_mask"] = region_mask(changes.pop("sold"))
+        values.update(changes)
+        return CarRecord(**values)
@@ -0,0 +1,374 @@
+import base64
+import binascii
+import threading
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+
+def encode_cursor(id: int) -> str:
+    return base64.urlsafe_b64encode(str(id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+class PageIterator:
+    # Yields one page of (id, car) pairs. Whether another page follows is
+    # only known once the page has been consumed, so next_cursor is None
+    # until then; it costs one extra item rather than a second walk.
+    def __init__(self, items: Iterator[Tuple[int, Any]], number: int):
+        self.next_cursor: Optional[str] = None
+        self._items = items
+        self._number = max(number, 0)
+
+    def __iter__(self) -> Iterator[Tuple[int, Any]]:
+        last = None
+        for index, (id, car) in enumerate(self._items):
+            if index == self._number:
+                if last is not None:
+                    self.next_cursor = encode_cursor(last)
+                return
+            last = id
+            yield id, car
+
+
+class IdAllocator:
+    # Monotonic counter plus a free-list of released ids, so allocation is
+    # O(1) no matter how sparse the id space has become.
+    def __init__(self, start: int = 1):
+        self._next = start
+        self._free: List[int] = []
+
+    def allocate(self, taken: Any = ()) -> int:
+        while self._free:
+            id = self._free.pop()
+            if id not in taken:
+                return id
+        id = self._next
+        self._next += 1
+        return id
+
+    def claim(self, id: int) -> None:
+        if id >= self._next:
+            self._next = id + 1
+
+    def release(self, id: int) -> None:
+        self._free.append(id)
+
+
+CHUNK_SIZE = 1024
+
+
+class Chunk:
+    __slots__ = ("ids", "cars")
+
+    def __init__(self, ids: Tuple[int, ...], cars: Dict[int, Any]):
+        self.ids = ids
+        self.cars = cars
+
+
+class CarSnapshot:
+    # Immutable view of the store at one version. Cars are split into
+    # chunks of CHUNK_SIZE consecutive ids, each holding its sorted ids; a
+    # write copies only the chunks it touches plus the chunk directory, and
+    # every other chunk is shared with the previous version.
+    __slots__ = ("version", "size", "_chunks", "_keys")
+
+    def __init__(
+        self,
+        version: int = 0,
+        size: int = 0,
+        chunks: Optional[Dict[int, Chunk]] = None,
+        keys: Tuple[int, ...] = (),
+    ):
+        self.version = version
+        self.size = size
+        self._chunks = chunks or {}
+        self._keys = keys
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, id: int) -> bool:
+        chunk = self._chunks.get(id // CHUNK_SIZE)
+        return chunk is not None and id in chunk.cars
+
+    def __getitem__(self, id: int) -> Any:
+        car = self.get(id)
+        if car is None:
+            raise KeyError(id)
+        return car
+
+    def get(self, id: int, default: Any = None) -> Any:
+        chunk = self._chunks.get(id // CHUNK_SIZE)
+        if chunk is None:
+            return default
+        return chunk.cars.get(id, default)
+
+    def _iter_from(self, after: Optional[int]) -> Iterator[Tuple[int, Any]]:
+        position = 0
+        if after is not None:
+            position = bisect_left(self._keys, after // CHUNK_SIZE)
+        for index in range(position, len(self._keys)):
+            chunk = self._chunks[self._keys[index]]
+            start = 0 if after is None else bisect_right(chunk.ids, after)
+            cars = chunk.cars
+            for id in islice(chunk.ids, start, None):
+                yield id, cars[id]
+
+    def items(self) -> Iterator[Tuple[int, Any]]:
+        return self._iter_from(None)
+
+    def last_id(self) -> Optional[int]:
+        if not self._keys:
+            return None
+        return self._chunks[self._keys[-1]].ids[-1]
+
+    def page(
+        self, after: Optional[int] = None, number: int = 10
+    ) -> Tuple[List[Tuple[int, Any]], Optional[str]]:
+        if number < 1:
+            return [], None
+        response = list(islice(self._iter_from(after), number + 1))
+
+        next_cursor = None
+        if len(response) > number:
+            del response[number:]
+            next_cursor = encode_cursor(response[-1][0])
+
+        return response, next_cursor
+
+    def iter_page(
+        self, after: Optional[int] = None, number: int = 10
+    ) -> PageIterator:
+        return PageIterator(self._iter_from(after), number)
+
+    @classmethod
+    def from_sorted(cls, items: Iterable[Tuple[int, Any]]) -> "CarSnapshot":
+        # Builds the chunks directly from (id, car) pairs in ascending id
+        # order, without the per-id bookkeeping of apply().
+        chunks: Dict[int, Chunk] = {}
+        ids: List[int] = []
+        cars: Dict[int, Any] = {}
+        current = None
+        previous = -1
+        for id, car in items:
+            if id <= previous:
+                raise ValueError("Ids must be strictly ascending")
+            previous = id
+            key = id // CHUNK_SIZE
+            if key != current:
+                if ids:
+                    chunks[current] = Chunk(tuple(ids), cars)
+                ids, cars, current = [], {}, key
+            ids.append(id)
+            cars[id] = car
+        if ids:
+            chunks[current] = Chunk(tuple(ids), cars)
+        size = sum(len(chunk.ids) for chunk in chunks.values())
+        return cls(1, size, chunks, tuple(chunks))
+
+    def apply(self, changes: Iterable[Tuple[int, Any, Any]]) -> "CarSnapshot":
+        chunks = dict(self._chunks)
+        touched: Dict[int, Tuple[List[int], Dict[int, Any]]] = {}
+        size = self.size
+
+        for id, old, new in changes:
+            key = id // CHUNK_SIZE
+            if key not in touched:
+                chunk = chunks.get(key)
+                touched[key] = (
+                    (list(chunk.ids), dict(chunk.cars)) if chunk else ([], {})
+                )
+            ids, cars = touched[key]
+
+            if new is None:
+                del cars[id]
+                del ids[bisect_left(ids, id)]
+                size -= 1
+                continue
+            if old is None:
+                if not ids or id > ids[-1]:
+                    ids.append(id)
+                else:
+                    insort(ids, id)
+                size += 1
+            cars[id] = new
+
+        reshaped = False
+        for key, (ids, cars) in touched.items():
+            if cars:
+                reshaped = reshaped or key not in chunks
+                chunks[key] = Chunk(tuple(ids), cars)
+            elif key in chunks:
+                reshaped = True
+                del chunks[key]
+
+        keys = tuple(sorted(chunks)) if reshaped else self._keys
+        return CarSnapshot(self.version + 1, size, chunks, keys)
+
+
+class CarStore:
+    # Versioned copy-on-write car store. Readers take the current snapshot
+    # with a single attribute read and never lock; writers serialise on
+    # write_lock, build the next snapshot and publish it atomically, then
+    # notify listeners while still holding the lock.
+    def __init__(self, cars: Optional[Dict[int, Any]] = None):
+        self._snapshot = CarSnapshot()
+        self._listeners: List[Any] = []
+        self._allocator = IdAllocator()
+        self.write_lock = threading.Lock()
+        if cars:
+            self.apply(cars.items())
+
+    def snapshot(self) -> CarSnapshot:
+        return self._snapshot
+
+    def __len__(self) -> int:
+        return len(self._snapshot)
+
+    def __contains__(self, id: int) -> bool:
+        return id in self._snapshot
+
+    def __getitem__(self, id: int) -> Any:
+        return self._snapshot[id]
+
+    def get(self, id: int, default: Any = None) -> Any:
+        return self._snapshot.get(id, default)
+
+    def items(self) -> Iterator[Tuple[int, Any]]:
+        return self._snapshot.items()
+
+    def page(
+        self, after: Optional[int] = None, number: int = 10
+    ) -> Tuple[List[Tuple[int, Any]], Optional[str]]:
+        return self._snapshot.page(after=after, number=number)
+
+    def iter_page(
+        self, after: Optional[int] = None, number: int = 10
+    ) -> PageIterator:
+        return self._snapshot.iter_page(after=after, number=number)
+
+    def __setitem__(self, id: int, car: Any) -> None:
+        self.apply([(id, car)])
+
+    def __delitem__(self, id: int) -> None:
+        with self.write_lock:
+            if id not in self._snapshot:
+                raise KeyError(id)
+            self._apply([(id, None)])
+
+    def modify(self, id: int, change: Callable[[Any], Any]) -> Any:
+        # Read-modify-write of one car as a single version, so concurrent
+        # edits cannot lose each other's changes.
+        with self.write_lock:
+            car = change(self._snapshot[id])
+            self._apply([(id, car)])
+        return car
+
+    def add(self, car: Any) -> int:
+        return self.add_many([car])[0]
+
+    def add_many(self, cars: Iterable[Any]) -> List[int]:
+        with self.write_lock:
+            current = self._snapshot
+            ids = set()
+            ops = []
+            for car in cars:
+                id = self._allocator.allocate(current)
+                while id in ids:
+                    id = self._allocator.allocate(current)
+                ids.add(id)
+                ops.append((id, car))
+            self._apply(ops)
+        return [id for id, _ in ops]
+
+    def restore(self, items: Iterable[Tuple[int, Any]]) -> None:
+        # Bulk-loads (id, car) pairs in strictly ascending id order into an
+        # empty store, as when reading a snapshot back.
+        with self.write_lock:
+            if len(self._snapshot) or self._listeners:
+                raise RuntimeError("Can only restore into an empty store")
+            snapshot = CarSnapshot.from_sorted(items)
+            last = snapshot.last_id()
+            if last is not None:
+                self._allocator.claim(last)
+            self._snapshot = snapshot
+
+    def apply(self, ops: Iterable[Tuple[int, Any]]) -> None:
+        # Applies (id, car) puts and (id, None) deletes as one new version.
+        with self.write_lock:
+            self._apply(ops)
+
+    def _apply(self, ops: Iterable[Tuple[int, Any]]) -> None:
+        current = self._snapshot
+        pending: Dict[int, Any] = {}
+        changes = []
+        for id, car in ops:
+            old = pending[id] if id in pending else current.get(id)
+            if car is None and old is None:
+                continue
+            pending[id] = car
+            changes.append((id, old, car))
+            if car is None:
+                self._allocator.release(id)
+            elif old is None:
+                self._allocator.claim(id)
+
+        self._snapshot = current.apply(changes)
+        self._notify(changes)
+
+    def _notify(self, changes: List[Tuple[int, Any, Any]]) -> None:
+        for listener in self._listeners:
+            add_many = getattr(listener, "add_many", None)
+            update = getattr(listener, "update", None)
+            added = []
+            for id, old, new in changes:
+                if old is None and add_many is not None:
+                    added.append((id, new))
+                    continue
+                if added:
+                    add_many(added)
+                    added = []
+                if old is not None and new is not None and update is not None:
+                    update(id, old, new)
+                    continue
+                if old is not None:
+                    listener.remove(id, old)
+                if new is not None:
+                    listener.add(id, new)
+            if added:
+                add_many(added)
+
+    def subscribe(self, listener: Any, replay: bool = True) -> None:
+        # Listeners expose add(id, car) and remove(id, car) and are kept in
+        # sync with every write; an update is a remove followed by an add,
+        # unless the listener exposes update(id, old, new). Listeners that
+        # can build in bulk may also expose add_many(items).
+        # They are only ever called under write_lock, so they see writes
+        # one at a time; readers that query them concurrently rely on each
+        # listener's own locking.
+        with self.write_lock:
+            if replay:
+                add_many = getattr(listener, "add_many", None)
+                if add_many is not None:
+                    add_many(self.items())
+                else:
+                    for id, car in self.items():
+                        listener.add(id, car)
+            self._listeners.append(listener)
@@ -0,0 +1,219 @@
+import heapq
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Each trie node caches this many terms, so no lookup can return more.
+MAX_SUGGESTIONS = 10
+
+
+class _Node:
+    __slots__ = ("children", "count", "text", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.count = 0
+        self.text: Optional[str] = None
+        # Cached best terms of this subtree as (-count, text); None when a
+        # write below this node has invalidated it.
+        self.top: Optional[List[Tuple[int, str]]] = None
+
+
+def max_distance(query: str) -> int:
+    if len(query) < 4:
+        return 0
+    if len(query) < 9:
+        return 1
+    return 2
+
+
+class Trie:
+    # Case-insensitive trie of terms with a car count per term. Each node
+    # lazily caches the `limit` most common terms below it, so a prefix
+    # lookup costs the length of the prefix once the cache is warm; a write
+    # only invalidates the caches on its own path.
+    def __init__(self, limit: int = MAX_SUGGESTIONS):
+        self.root = _Node()
+        self.limit = limit
+
+    def add(self, text: str, delta: int = 1) -> None:
+        path = [self.root]
+        node = self.root
+        for char in text.lower():
+            child = node.children.get(char)
+            if child is None:
+                if delta < 0:
+                    return
+                child = node.children[char] = _Node()
+            node = child
+            path.append(node)
+
+        node.count = max(node.count + delta, 0)
+        if node.count and node.text is None:
+            node.text = text
+        elif not node.count:
+            node.text = None
+
+        for node in path:
+            node.top = None
+
+        # Drop branches that no longer lead to any term.
+        key = text.lower()
+        for depth in range(len(path) - 1, 0, -1):
+            node = path[depth]
+            if node.count or node.children:
+                break
+            del path[depth - 1].children[key[depth - 1]]
+
+    def _top(self, node: _Node) -> List[Tuple[int, str]]:
+        if node.top is None:
+            candidates = [(-node.count, node.text)] if node.count else []
+            for child in node.children.values():
+                candidates.extend(self._top(child))
+            node.top = heapq.nsmallest(self.limit, candidates)
+        return node.top
+
+    def prefix(self, query: str) -> Dict[str, Tuple[int, int]]:
+        # Returns {text: (0, -count)} for the best terms starting with query.
+        node = self.root
+        for char in query.lower():
+            node = node.children.get(char)
+            if node is None:
+                return {}
+        return {
+            text: (0, negative_count)
+            for negative_count, text in self._top(node)
+        }
+
+    def fuzzy(self, query: str) -> Dict[str, Tuple[int, int]]:
+        # Returns {text: (distance, -count)} for terms starting with something
+        # within max_distance edits of the query.
+        query = query.lower()
+        limit = max_distance(query)
+        results: Dict[str, Tuple[int, int]] = {}
+        first = self.root.children.get(query[0]) if query else None
+        if not limit or first is None:
+            return results
+
+        # Bounded Levenshtein walk: each node carries the DP row of distances
+        # between query prefixes and the node's path, and a branch is pruned
+        # as soon as no cell is within the limit. Only the diagonal band of
+        # width 2 * limit + 1 can be within the limit, so cells outside it
+        # are never computed. Like most typeahead, the first character is
+        # trusted, which keeps the walk out of the dense top of the trie.
+        size = len(query)
+        outside = limit + 1
+        first_row = [1] + list(range(size))
+        first_row[limit + 2 :] = [outside] * (size - limit - 1)
+        stack = [
+            (child, char, 2, first_row)
+            for char, child in first.children.items()
+        ]
+        while stack:
+            node, char, depth, previous = stack.pop()
+            row = [outside] * (size + 1)
+            if depth <= limit:
+                row[0] = depth
+            low = depth - limit if depth > limit else 1
+            high = depth + limit if depth + limit < size else size
+            nearest = row[low - 1]
+            # The three-way minimum is spelled out: this loop is the whole
+            # cost of a fuzzy lookup.
+            for column in range(low, high + 1):
+                cell = row[column - 1] + 1
+                above = previous[column] + 1
+                if above < cell:
+                    cell = above
+                diagonal = previous[column - 1] + (query[column - 1] != char)
+                if diagonal < cell:
+                    cell = diagonal
+                row[column] = cell
+                if cell < nearest:
+                    nearest = cell
+
+            distance = row[size]
+            if distance <= limit:
+                for negative_count, text in self._top(node):
+                    best = results.get(text)
+                    if best is None or distance < best[0]:
+                        results[text] = (distance, negative_count)
+            if nearest <= limit:
+                stack.extend(
+                    (child, next_char, depth + 1, row)
+                    for next_char, child in node.children.items()
+                )
+
+        return results
+
+
+class CarSuggestions:
+    # Store listener keeping one trie for makes and one for models. The
+    # tries have a lock of their own, held only for the trie work itself,
+    # so lookups do not wait for the store's write lock and everything else
+    # that runs under it.
+    FIELDS = ("make", "model")
+
+    def __init__(self, limit: int = MAX_SUGGESTIONS):
+        self.limit = limit
+        self.tries = {field: Trie(limit=limit) for field in self.FIELDS}
+        self._lock = threading.Lock()
+
+    def _update(self, car: Any, delta: int) -> None:
+        with self._lock:
+            for field, trie in self.tries.items():
+                text = getattr(car, field)
+                if text:
+                    trie.add(text, delta)
+
+    def add(self, id: int, car: Any) -> None:
+        self._update(car, 1)
+
+    def add_many(self, items: Iterable[Tuple[int, Any]]) -> None:
+        counts = {field: Counter() for field in self.FIELDS}
+        for _, car in items:
+            for field in self.FIELDS:
+                text = getattr(car, field)
+                if text:
+                    counts[field][text] += 1
+
+        with self._lock:
+            for field, trie in self.tries.items():
+                for text, count in counts[field].items():
+                    trie.add(text, count)
+
+    def remove(self, id: int, car: Any) -> None:
+        self._update(car, -1)
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        # Lookups fill the nodes' caches, so they take the lock too.
+        with self._lock:
+            return self._suggest(query, min(limit, self.limit))
+
+    def _suggest(self, query: str, limit: int) -> List[Dict[str, Any]]:
+        ranked = []
+        for field, trie in self.tries.items():
+            for text, (distance, negative_count) in trie.prefix(query).items():
+                ranked.append((distance, negative_count, text, field))
+
+        # Typo matches always rank below exact prefix matches, so they are
+        # only worth looking for when the prefixes did not fill the page.
+        if len(ranked) < limit:
+            exact = {(text, field) for _, _, text, field in ranked}
+            for field, trie in self.tries.items():
+                for text, (distance, negative_count) in trie.fuzzy(
+                    query
+                ).items():
+                    if (text, field) not in exact:
+                        ranked.append((distance, negative_count, text, field))
+
+        return [
+            {
+                "text": text,
+                "field": field,
+                "count": -negative_count,
+                "distance": distance,
+            }
+            for distance, negative_count, text, field in heapq.nsmallest(
+                limit, ranked
+            )
+        ]
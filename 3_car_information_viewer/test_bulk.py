@@ -0,0 +1,62 @@
+import asyncio
+import json
+
+import pytest
+
+from bulk import iter_json_rows
+
+ROWS = [
+    {"make": "CarBrand", "price": 25000.0, "sold": ["North America"]},
+    {"make": "Spéedy", "year": 2021, "autonomous": True},
+    {"make": None, "price": 123},
+]
+
+
+def parse(body: bytes, chunk_size: int = None):
+    async def chunks():
+        size = chunk_size or len(body) or 1
+        for start in range(0, len(body), size):
+            yield body[start : start + size]
+
+    async def collect():
+        return [row async for row in iter_json_rows(chunks())]
+
+    return asyncio.run(collect())
+
+
+def ndjson(rows) -> bytes:
+    return "".join(json.dumps(row) + "\n" for row in rows).encode()
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        json.dumps(ROWS).encode(),
+        json.dumps(ROWS, indent=2, ensure_ascii=False).encode(),
+        ndjson(ROWS),
+        # No trailing newline and blank lines in between.
+        ndjson(ROWS).replace(b"\n", b"\n\n").rstrip(),
+    ],
+)
+def test_rows_survive_any_chunk_split(body):
+    for chunk_size in (None, 1, 2, 3, 7, 64):
+        assert parse(body, chunk_size) == ROWS, chunk_size
+
+
+def test_numbers_split_across_chunks():
+    assert parse(b"  [1, 23, 456]", 1) == [1, 23, 456]
+    assert parse(b"1\n23\n456", 1) == [1, 23, 456]
+
+
+def test_empty_bodies():
+    assert parse(b"") == []
+    assert parse(b"[]") == []
+    assert parse(b" \n ") == []
+
+
+@pytest.mark.parametrize(
+    "body", [b"[{}, {", b"[1, 2", b"[{}] {}", b'{"make": 1}\n{"ma']
+)
+def test_malformed_bodies_raise(body):
+    with pytest.raises(ValueError):
+        parse(body)
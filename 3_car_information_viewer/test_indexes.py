@@ -0,0 +1,89 @@
+import random
+
+from indexes import CarIndex
+from records import REGIONS, CarRecord, region_mask
+
+MAKES = ("CarBrand", "Speedy", "Elektrik", "CarPro")
+ENGINES = ("V4", "V8", "V12")
+
+
+def random_car(rng: random.Random) -> CarRecord:
+    return CarRecord(
+        make=rng.choice(MAKES),
+        model="Model",
+        year=rng.randint(1970, 2021),
+        price=float(rng.randint(1, 100) * 1000),
+        engine=rng.choice(ENGINES),
+        autonomous=rng.random() < 0.5,
+        sold_mask=region_mask(rng.sample(REGIONS, rng.randint(0, 3))),
+    )
+
+
+def matches(
+    car, make, engine, region, min_year, max_year, min_price, max_price
+):
+    return (
+        (make is None or car.make.lower() == make.lower())
+        and (engine is None or car.engine.lower() == engine.lower())
+        and (region is None or region in car.sold)
+        and (min_year is None or car.year >= min_year)
+        and (max_year is None or car.year <= max_year)
+        and (min_price is None or car.price >= min_price)
+        and (max_price is None or car.price <= max_price)
+    )
+
+
+def test_search_combines_predicates():
+    index = CarIndex()
+    index.add(1, CarRecord("CarBrand", "Fast", 1998, 25000.0, "V8", False))
+    index.add(2, CarRecord("Speedy", "SUV", 2021, 55400.0, "V4", False))
+    index.add(3, CarRecord("carbrand", "Beetle", 2004, 21299.99, "V4", False))
+
+    assert index.search(make="CARBRAND") == [1, 3]
+    assert index.search(make="carbrand", engine="v4") == [3]
+    assert index.search(min_year=2000) == [2, 3]
+    assert index.search(min_price=22000, max_price=30000) == [1]
+    assert index.search(make="Nope") == []
+    assert index.search() == []
+
+
+def test_search_matches_brute_force_across_writes():
+    rng = random.Random(7)
+    index = CarIndex()
+    cars = {}
+    index.add_many(
+        (id, cars.setdefault(id, random_car(rng))) for id in range(500)
+    )
+
+    for _ in range(300):
+        id = rng.randrange(600)
+        if id in cars and rng.random() < 0.5:
+            index.remove(id, cars.pop(id))
+        else:
+            if id in cars:
+                index.remove(id, cars[id])
+            cars[id] = random_car(rng)
+            index.add(id, cars[id])
+
+    for _ in range(200):
+        low_year = rng.choice([None, rng.randint(1970, 2021)])
+        low_price = rng.choice([None, float(rng.randint(1, 100) * 1000)])
+        query = {
+            "make": rng.choice([None, *MAKES]),
+            "engine": rng.choice([None, *ENGINES]),
+            "region": rng.choice([None, *REGIONS]),
+            "min_year": low_year,
+            "max_year": rng.choice(
+                [None, (low_year or 1970) + rng.randint(0, 20)]
+            ),
+            "min_price": low_price,
+            "max_price": rng.choice(
+                [None, (low_price or 0) + rng.randint(0, 50) * 1000]
+            ),
+        }
+        if all(value is None for value in query.values()):
+            continue
+        expected = sorted(
+            id for id, car in cars.items() if matches(car, **query)
+        )
+        assert index.search(**query) == expected, query
@@ -0,0 +1,48 @@
+import os
+import re
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="module")
+def client(tmp_path_factory):
+    # database.py loads its data directory on import.
+    os.environ["CARS_DATA_DIR"] = str(tmp_path_factory.mktemp("cars"))
+    from main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+def next_link(body: str):
+    links = re.findall(r'href="([^"]*after=[^"]*)"', body)
+    return links[0].replace("&amp;", "&") if links else None
+
+
+@pytest.mark.parametrize("stream", ["false", "true"])
+def test_pages_link_to_the_next_one(client, stream):
+    url = f"/cars?number=2&stream={stream}"
+    pages = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        pages.append(response.text.count("<h2>"))
+        url = next_link(response.text)
+
+    # Five seed cars in pages of two, and no link after the last one.
+    assert pages == [2, 2, 1]
+
+
+@pytest.mark.parametrize(
+    "query, status_code",
+    [
+        ("number=abc", 422),
+        ("number=0", 422),
+        ("number=1000", 400),
+        ("number=1000&stream=true", 200),
+        ("number=1000000&stream=true", 422),
+    ],
+)
+def test_page_size_is_validated(client, query, status_code):
+    assert client.get(f"/cars?{query}").status_code == status_code
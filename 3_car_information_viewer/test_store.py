@@ -0,0 +1,123 @@
+import random
+import threading
+
+from analytics import CarColumns
+from indexes import CarIndex
+from records import CarRecord
+from store import CHUNK_SIZE, CarStore, decode_cursor
+
+
+def car(make: str, year: int = 2000) -> CarRecord:
+    return CarRecord(make, "Model", year, 1000.0, "V4", False)
+
+
+def test_snapshots_are_copy_on_write():
+    cars = CarStore({id: car(f"M{id}") for id in range(1, 3 * CHUNK_SIZE)})
+    before = cars.snapshot()
+
+    cars.modify(5, lambda stored: stored.replace(make="Changed"))
+    added = cars.add(car("Added"))
+    del cars[6]
+    after = cars.snapshot()
+
+    assert after.version == before.version + 3
+    assert (before[5].make, after[5].make) == ("M5", "Changed")
+    assert 6 in before and 6 not in after
+    assert added not in before and after[added].make == "Added"
+    assert len(before) == 3 * CHUNK_SIZE - 1
+    assert len(after) == len(before)
+    assert [id for id, _ in before.items()] == list(range(1, 3 * CHUNK_SIZE))
+    # Only the chunks that were written to are copied.
+    assert after._chunks[0] is not before._chunks[0]
+    assert after._chunks[1] is before._chunks[1]
+
+
+def test_iter_page_matches_page():
+    cars = CarStore({id: f"car {id}" for id in range(1, 2 * CHUNK_SIZE, 3)})
+    snapshot = cars.snapshot()
+
+    for after in (None, 0, 1, 100, CHUNK_SIZE - 1, 2 * CHUNK_SIZE):
+        for number in (0, 1, 7, CHUNK_SIZE, 10 * CHUNK_SIZE):
+            expected, cursor = snapshot.page(after=after, number=number)
+            page = snapshot.iter_page(after=after, number=number)
+            assert page.next_cursor is None
+            assert list(page) == expected
+            assert page.next_cursor == cursor, (after, number)
+
+    cursor = snapshot.page(number=5)[1]
+    assert decode_cursor(cursor) == 13
+
+
+def test_concurrent_reads_and_writes():
+    makes = ("A", "B", "C")
+    cars = CarStore()
+    index = CarIndex()
+    columns = CarColumns()
+    cars.subscribe(index)
+    cars.subscribe(columns)
+    done = threading.Event()
+    errors = []
+
+    def write(seed):
+        rng = random.Random(seed)
+        try:
+            for _ in range(500):
+                action = rng.random()
+                id = rng.randint(1, 2000)
+                if action < 0.4:
+                    cars.add_many(
+                        car(rng.choice(makes), rng.randint(1990, 2020))
+                        for _ in range(rng.randint(1, 20))
+                    )
+                elif action < 0.7:
+                    try:
+                        cars.modify(
+                            id,
+                            lambda stored: stored.replace(
+                                make=rng.choice(makes)
+                            ),
+                        )
+                    except KeyError:
+                        pass
+                else:
+                    try:
+                        del cars[id]
+                    except KeyError:
+                        pass
+        except Exception as error:
+            errors.append(error)
+
+    def read():
+        try:
+            while not done.is_set():
+                snapshot = cars.snapshot()
+                listed = list(snapshot.items())
+                assert len(listed) == len(snapshot)
+                assert list(snapshot.items()) == listed
+                assert all(
+                    isinstance(id, int) for id in index.search(make="A")
+                )
+                counts = columns.counts_by_year_and_engine()
+                assert all(row["count"] > 0 for row in counts)
+                columns.price_percentiles()
+        except Exception as error:
+            errors.append(error)
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    writers = [threading.Thread(target=write, args=(n,)) for n in range(2)]
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    done.set()
+    for thread in readers:
+        thread.join()
+
+    assert errors == []
+    # Once writes stop, every listener agrees with the store.
+    final = dict(cars.items())
+    for make in makes:
+        expected = sorted(id for id, c in final.items() if c.make == make)
+        assert index.search(make=make) == expected
+    assert columns.size == len(final)
+    assert sorted(columns.id[: columns.size]) == sorted(final)
@@ -0,0 +1,104 @@
+import random
+
+from records import CarRecord
+from suggest import CarSuggestions, Trie, max_distance
+
+
+def levenshtein(a: str, b: str) -> int:
+    row = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        previous, row[0] = row[0], i
+        for j in range(1, len(b) + 1):
+            previous, row[j] = row[j], min(
+                row[j] + 1, row[j - 1] + 1, previous + (char != b[j - 1])
+            )
+    return row[-1]
+
+
+def car(make: str, model: str) -> CarRecord:
+    return CarRecord(make, model, 2000, 1.0, "V4", False)
+
+
+def random_terms(rng: random.Random, size: int):
+    letters = "abcde"
+    return [
+        "".join(rng.choice(letters) for _ in range(rng.randint(2, 10)))
+        for _ in range(size)
+    ]
+
+
+def test_prefix_ranks_by_count():
+    rng = random.Random(3)
+    trie = Trie(limit=5)
+    counts = {}
+    for term in random_terms(rng, 300):
+        count = rng.randint(1, 20)
+        trie.add(term, count)
+        counts[term] = counts.get(term, 0) + count
+
+    for query in ("", "a", "ab", "abc", "e", "zz"):
+        expected = sorted(
+            (-count, term)
+            for term, count in counts.items()
+            if term.startswith(query)
+        )[:5]
+        assert trie.prefix(query) == {
+            term: (0, negative_count) for negative_count, term in expected
+        }, query
+
+
+def test_fuzzy_matches_brute_force():
+    rng = random.Random(5)
+    # A limit above the number of terms, so node caches never truncate.
+    trie = Trie(limit=10_000)
+    counts = {}
+    for term in random_terms(rng, 400):
+        trie.add(term)
+        counts[term] = counts.get(term, 0) + 1
+    for term in rng.sample(sorted(counts), 100):
+        trie.add(term, -counts.pop(term))
+
+    for query in random_terms(rng, 200):
+        limit = max_distance(query)
+        expected = {}
+        for term, count in counts.items():
+            if not limit or term[0] != query[0]:
+                continue
+            # A term matches when one of its prefixes is within the limit.
+            distance = min(
+                levenshtein(query, term[:end])
+                for end in range(2, len(term) + 1)
+            )
+            if distance <= limit:
+                expected[term] = (distance, -count)
+        assert trie.fuzzy(query) == expected, query
+
+
+def test_removed_terms_are_pruned():
+    trie = Trie()
+    trie.add("Beetle")
+    trie.add("beet")
+    trie.add("Beetle", -1)
+    assert trie.prefix("bee") == {"beet": (0, -1)}
+    trie.add("beet", -1)
+    assert trie.root.children == {}
+
+
+def test_suggestions_rank_prefixes_above_typos():
+    suggestions = CarSuggestions()
+    suggestions.add_many(
+        [
+            (1, car("CarBrand", "Beetle")),
+            (2, car("CarBrand", "Fast")),
+            (3, car("Carpro", "Supersonic")),
+        ]
+    )
+
+    assert [
+        (item["text"], item["count"], item["distance"])
+        for item in suggestions.suggest("carb")
+    ] == [("CarBrand", 2, 0), ("Carpro", 1, 1)]
+    assert suggestions.suggest("beatle")[0]["text"] == "Beetle"
+
+    suggestions.remove(1, car("CarBrand", "Beetle"))
+    assert suggestions.suggest("beetle") == []
@@ -0,0 +1,78 @@
+# FriendGraph on a synthetic graph: edge checks, mutual-friend counts and
+# friend-of-friend suggestions, with edge checks and mutual friends also
+# done on the plain friend lists the app used to keep. Endpoints are
+# skewed towards low ids, so a few users are hubs as in a real network.
+#
+#   python bench_friends.py [edges] [users]
+import random
+import sys
+import time
+
+from friends import FriendGraph
+
+
+def random_edges(edges: int, users: int, seed: int = 1):
+    rng = random.Random(seed)
+    for _ in range(edges):
+        yield (
+            f"user{int(users * rng.random() ** 2)}",
+            f"user{rng.randrange(users)}",
+        )
+
+
+def timed(action, arguments) -> str:
+    latencies = []
+    for argument in arguments:
+        start = time.perf_counter()
+        action(*argument)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1e6
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+    return f"p50 {p50:9.1f}us p99 {p99:9.1f}us"
+
+
+def run(edges: int, users: int, samples: int = 2000) -> None:
+    graph = FriendGraph()
+    start = time.perf_counter()
+    graph.add_many(random_edges(edges, users))
+    print(
+        f"{graph.edges:,} edges between {len(graph):,} users, "
+        f"built in {time.perf_counter() - start:.2f}s"
+    )
+
+    rng = random.Random(2)
+    people = [f"user{rng.randrange(users)}" for _ in range(samples)]
+    pairs = list(zip(people, reversed(people)))
+    lists = {username: graph.friends(username) for username in people}
+
+    def listed_mutual(username: str, other: str) -> int:
+        others = lists[other]
+        return sum(friend in others for friend in lists[username])
+
+    results = [
+        ("edge check", timed(graph.are_friends, pairs)),
+        ("edge check, lists", timed(lambda a, b: b in lists[a], pairs)),
+        ("mutual count", timed(graph.mutual_count, pairs)),
+        ("mutual count, lists", timed(listed_mutual, pairs)),
+        (
+            "suggestions depth 2",
+            timed(graph.suggestions, [(person,) for person in people]),
+        ),
+        (
+            "suggestions depth 3",
+            timed(
+                lambda person: graph.suggestions(person, depth=3),
+                [(person,) for person in people[:200]],
+            ),
+        ),
+    ]
+    for name, result in results:
+        print(f"  {name:<20} {result}")
+
+
+if __name__ == "__main__":
+    arguments = [int(argument) for argument in sys.argv[1:]]
+    edges = arguments[0] if arguments else 1_000_000
+    users = arguments[1] if len(arguments) > 1 else 100_000
+    run(edges, users)
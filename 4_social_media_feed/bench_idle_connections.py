@@ -0,0 +1,143 @@
+# Holds idle /notifications/stream connections open against one uvicorn
+# worker and samples the worker's resident memory while they sit there,
+# so keepalives and broker bookkeeping can be seen not to grow. Linux only,
+# as memory is read from /proc; each side needs a file descriptor per
+# connection, so raise `ulimit -n` above the connection count first.
+#
+#   python bench_idle_connections.py [connections] [hold seconds]
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+import requests
+
+HOST = "127.0.0.1"
+PORT = 8765
+BASE_URL = f"http://{HOST}:{PORT}"
+LOGIN = {"username": "idle", "password": "idle-password"}
+
+
+def rss_mib(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("VmRSS not found")
+
+
+def start_server() -> subprocess.Popen:
+    environment = {"SECRET_KEY": "bench-secret", **os.environ}
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--host",
+            HOST,
+            "--port",
+            str(PORT),
+            "--log-level",
+            "warning",
+            "--backlog",
+            "4096",
+        ],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        env=environment,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and server.poll() is None:
+        try:
+            requests.get(BASE_URL + "/")
+            return server
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Server did not start")
+
+
+def log_in() -> str:
+    requests.post(
+        BASE_URL + "/register",
+        data={**LOGIN, "name": "Idle", "email": "idle@email.com"},
+        allow_redirects=False,
+    )
+    response = requests.post(
+        BASE_URL + "/login", data=LOGIN, allow_redirects=False
+    )
+    return response.cookies["auth"]
+
+
+async def connect(token: str):
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    writer.write(
+        (
+            "GET /notifications/stream HTTP/1.1\r\n"
+            f"Host: {HOST}\r\n"
+            f"Cookie: auth={token}\r\n\r\n"
+        ).encode()
+    )
+    head = await reader.readuntil(b"\r\n\r\n")
+    if not head.startswith(b"HTTP/1.1 200"):
+        raise RuntimeError(head.decode(errors="replace"))
+    return reader, writer
+
+
+async def drain(reader: asyncio.StreamReader) -> None:
+    # Reads and discards keepalives so no socket buffer fills up.
+    while await reader.read(4096):
+        pass
+
+
+async def hold(pid: int, token: str, connections: int, seconds: float):
+    def report(label: str) -> None:
+        stats = requests.get(BASE_URL + "/metrics/broker").json()
+        print(
+            f"{label:<28} rss {rss_mib(pid):7.1f} MiB  "
+            f"subscriptions {stats['subscriptions']:>6,}"
+        )
+
+    report("before")
+    opened = []
+    batch = 500
+    while len(opened) < connections:
+        size = min(batch, connections - len(opened))
+        opened.extend(
+            await asyncio.gather(*(connect(token) for _ in range(size)))
+        )
+        if len(opened) % (batch * 4) == 0 or len(opened) == connections:
+            report(f"{len(opened):,} open")
+
+    drains = [asyncio.ensure_future(drain(reader)) for reader, _ in opened]
+    started = time.monotonic()
+    while time.monotonic() - started < seconds:
+        await asyncio.sleep(min(10, seconds))
+        report(f"idle {time.monotonic() - started:.0f}s")
+
+    for _, writer in opened:
+        writer.close()
+    for task in drains:
+        task.cancel()
+    await asyncio.gather(*drains, return_exceptions=True)
+    await asyncio.sleep(2)
+    report("closed")
+
+
+def main() -> None:
+    arguments = sys.argv[1:]
+    connections = int(arguments[0]) if arguments else 10_000
+    seconds = float(arguments[1]) if len(arguments) > 1 else 60
+
+    server = start_server()
+    try:
+        token = log_in()
+        asyncio.run(hold(server.pid, token, connections, seconds))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
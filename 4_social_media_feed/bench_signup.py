@@ -0,0 +1,66 @@
+# Signup latency against the number of registered users, bcrypt aside: the
+# availability check and insert through UserRepository, against the scan
+# over every user's email that register used to do.
+#
+#   python bench_signup.py [sizes...]
+import sys
+import time
+
+from repository import UserRepository
+from storage import MemoryBackend
+
+
+def user(index: int):
+    return {
+        "name": f"User {index}",
+        "username": f"user{index}",
+        "email": f"User{index}@Email.com",
+        "birthday": "",
+        "hashed_password": "",
+    }
+
+
+def percentiles(latencies) -> str:
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2] * 1e6
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+    return f"p50 {p50:9.1f}us p99 {p99:9.1f}us"
+
+
+def run(size: int, signups: int = 10_000, scans: int = 20) -> None:
+    users = {f"user{index}": user(index) for index in range(size)}
+    repository = UserRepository(MemoryBackend(users, {}, {}))
+
+    indexed = []
+    for index in range(size, size + signups):
+        new = user(index)
+        start = time.perf_counter()
+        if repository.is_available(new["username"], new["email"]):
+            repository.add(new)
+        indexed.append(time.perf_counter() - start)
+
+    scanned = []
+    for index in range(size + signups, size + signups + scans):
+        new = user(index)
+        start = time.perf_counter()
+        taken = new["username"] in users or any(
+            users[name]["email"] == new["email"] for name in users
+        )
+        if not taken:
+            users[new["username"]] = new
+        scanned.append(time.perf_counter() - start)
+
+    print(
+        f"{size:>9,} users  indexed {percentiles(indexed)}  "
+        f"scan {percentiles(scanned)}"
+    )
+
+
+if __name__ == "__main__":
+    sizes = [int(size) for size in sys.argv[1:]] or [
+        10_000,
+        100_000,
+        1_000_000,
+    ]
+    for size in sizes:
+        run(size)
@@ -0,0 +1,95 @@
+# Registration and login throughput through UserRepository on the memory
+# and SQLite backends, from a number of threads at once so SQLite's group
+# commit has writes to batch. bcrypt is left out of both, as it costs the
+# same whatever stores the user; one hash is timed for scale.
+#
+#   python bench_storage.py [threads...]
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from hashing import _hash
+from repository import UserRepository
+from storage import MemoryBackend, SqliteBackend
+
+REGISTRATIONS = 4000
+LOGINS = 200_000
+
+
+def user(index: int):
+    return {
+        "name": f"User {index}",
+        "username": f"user{index}",
+        "email": f"user{index}@email.com",
+        "birthday": "",
+        "hashed_password": "",
+    }
+
+
+def in_threads(threads: int, work, total: int) -> float:
+    # Splits `total` calls of work(index) across the threads; returns
+    # calls per second.
+    def worker(offset: int) -> None:
+        for index in range(offset, total, threads):
+            work(index)
+
+    workers = [
+        threading.Thread(target=worker, args=(offset,))
+        for offset in range(threads)
+    ]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return total / (time.perf_counter() - start)
+
+
+def measure(repository: UserRepository, threads: int):
+    registered = in_threads(
+        threads, lambda index: repository.add(user(index)), REGISTRATIONS
+    )
+    logged_in = in_threads(
+        threads,
+        lambda index: repository.get(f"user{index % REGISTRATIONS}"),
+        LOGINS,
+    )
+    return registered, logged_in
+
+
+def run(threads: int) -> None:
+    memory = UserRepository(MemoryBackend({}, {}, {}))
+    results = [("memory", *measure(memory, threads))]
+
+    with tempfile.TemporaryDirectory() as directory:
+        backend = SqliteBackend(os.path.join(directory, "social.db"))
+        results.append(
+            ("sqlite", *measure(UserRepository(backend), threads))
+        )
+
+        # Users are loaded at startup, so logins above never touch the
+        # file; this is the read-through for users another worker added.
+        logged_in = in_threads(
+            threads,
+            lambda index: backend.get_user(f"user{index % REGISTRATIONS}"),
+            REGISTRATIONS * 5,
+        )
+        results.append(("sqlite, read-through", None, logged_in))
+        backend.close()
+
+    for name, registered, logged_in in results:
+        registrations = (
+            "" if registered is None else f"register {registered:9,.0f}/s  "
+        )
+        print(
+            f"{threads:>3} threads  {name:<21} {registrations:<24}"
+            f"login {logged_in:11,.0f}/s"
+        )
+
+
+if __name__ == "__main__":
+    print(f"one bcrypt hash: {_hash('password')[1] * 1000:.0f}ms")
+    for threads in [int(threads) for threads in sys.argv[1:]] or [1, 32]:
+        run(threads)
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set
+
+
+class Subscription:
+    # A bounded mailbox for one connected client. When the client falls
+    # behind, the oldest messages are dropped and counted so it can catch
+    # up from the paginated API instead.
+    __slots__ = ("broker", "topic", "messages", "dropped", "closed", "_ready")
+
+    def __init__(self, broker: "Broker", topic: str, maxsize: int):
+        self.broker = broker
+        self.topic = topic
+        self.messages: Deque[Any] = deque(maxlen=maxsize)
+        self.dropped = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+
+    def _put(self, message: Any) -> None:
+        if len(self.messages) == self.messages.maxlen:
+            self.dropped += 1
+        self.messages.append(message)
+        self._ready.set()
+
+    def take_dropped(self) -> int:
+        dropped, self.dropped = self.dropped, 0
+        return dropped
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        # Returns the next message, or None on timeout or once closed.
+        if not self.messages and not self.closed:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if not self.messages:
+            return None
+        return self.messages.popleft()
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self._ready.set()
+            self.broker._unsubscribe(self)
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, et, ev, traceback) -> None:
+        self.close()
+
+
+class Broker:
+    # In-process pub/sub keyed by topic. Subscribers live on the event
+    # loop; publish may be called from any thread, and hands delivery to
+    # the loop when called from a threadpool route.
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._topics: Dict[str, Set[Subscription]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+
+        self.published = 0
+        self.delivered = 0
+
+    def subscribe(self, topic: str) -> Subscription:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        subscription = Subscription(self, topic, self.maxsize)
+        self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def _unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._topics.get(subscription.topic)
+        if subscriptions is not None:
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._topics[subscription.topic]
+
+    def _deliver(self, topic: str, message: Any) -> None:
+        for subscription in self._topics.get(topic, ()):
+            subscription._put(message)
+            self.delivered += 1
+
+    def publish(self, topic: str, message: Any) -> None:
+        self.published += 1
+        if topic not in self._topics or self._loop is None:
+            return
+        if threading.get_ident() == self._loop_thread:
+            self._deliver(topic, message)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._deliver, topic, message)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "topics": len(self._topics),
+            "subscriptions": sum(map(len, self._topics.values())),
+            "published": self.published,
+            "delivered": self.delivered,
+        }
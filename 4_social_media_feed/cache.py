@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+
+class _Entry:
+    __slots__ = ("expires", "user", "view")
+
+    def __init__(self, expires: float, user: Any):
+        self.expires = expires
+        self.user = user
+        self.view: Optional[Any] = None
+
+
+class UserCache:
+    # LRU of validated user models keyed by username, each kept for at most
+    # `ttl` seconds. The view model is built from the cached user on first
+    # use and cached alongside it. Entries are dropped whenever the user
+    # changes, so a hit is never staler than the repository.
+    def __init__(
+        self,
+        load: Callable[[str], Optional[Any]],
+        view: Callable[[Any], Any],
+        maxsize: int = 1024,
+        ttl: float = 300.0,
+    ):
+        self._load = load
+        self._view = view
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so a load that raced with a write is
+        # returned to its caller but never cached.
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_time = 0.0
+        self.view_hits = 0
+        self.view_misses = 0
+        self.view_time = 0.0
+
+    def _entry(self, username: str) -> Optional[_Entry]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(username)
+            if entry is not None and entry.expires > now:
+                self._entries.move_to_end(username)
+                self.hits += 1
+                return entry
+            generation = self._generation
+
+        started = time.perf_counter()
+        user = self._load(username)
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self.misses += 1
+            self.load_time += elapsed
+            if user is None:
+                self._entries.pop(username, None)
+                return None
+            entry = _Entry(now + self.ttl, user)
+            if generation != self._generation:
+                return entry
+            self._entries[username] = entry
+            self._entries.move_to_end(username)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def get(self, username: str) -> Optional[Any]:
+        entry = self._entry(username)
+        return None if entry is None else entry.user
+
+    def view(self, username: str) -> Optional[Any]:
+        entry = self._entry(username)
+        if entry is None:
+            return None
+        if entry.view is not None:
+            self.view_hits += 1
+            return entry.view
+
+        started = time.perf_counter()
+        entry.view = self._view(entry.user)
+        self.view_time += time.perf_counter() - started
+        self.view_misses += 1
+        return entry.view
+
+    def invalidate(self, username: str) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(username, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        average_load = self.load_time / self.misses if self.misses else 0.0
+        average_view = (
+            self.view_time / self.view_misses if self.view_misses else 0.0
+        )
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            # Estimated from the average cost of the misses.
+            "validation_time_saved": self.hits * average_load
+            + self.view_hits * average_view,
+        }
@@ -4,21 +4,6 @@ users = {
         "username": "jadkhalili",
         "email": "jad@email.com",
         "birthday": "1st January 1970",
-        "friends": ["johndoe", "janedoe1", "doe.jim95"],
-        "notifications": [
-            {
-                "author": "janedoe1",
-                "description": "liked a post you made."
-            },
-            {
-                "author": "doe.jim95",
-                "description": "Messaged you: \"Wanna meet up this weekend?\""
-            },
-            {
-                "author": "johndoe",
-                "description": "turns a year older today. Wish them a happy birthday!"
-            },
-        ],
         "hashed_password": "$2b$12$qklRsJyj.PAVzezU7vfj5uBjaelr7lSIFqrNT.7CnJEPkRi7nstxO"
     },
     "johndoe": {
@@ -26,21 +11,44 @@ users = {
         "username": "johndoe",
         "email": "johndoe@email.com",
         "birthday": "31st December 1999",
-        "friends": ["jadkhalili", "lip.sum"],
-        "notifications": [
-            {
-                "author": "jadkhalili",
-                "description": "Messaged you: \"k\""
-            },
-            {
-                "author": "lip.sum",
-                "description": "tagged you in a post."
-            },
-            {
-                "author": "kwurtea",
-                "description": "Messaged you: \"you there???\""
-            },
-        ],
         "hashed_password": "$2b$12$4SqrDVzv6w2wRAbcdVxCdu.zrDJjk/TVWYeStP2V8odpKNDtHqgA."
     }
-}
\ No newline at end of file
+}
+
+# Friendships are mutual; each pair may be listed from either side.
+friends = {
+    "jadkhalili": ["johndoe", "janedoe1", "doe.jim95"],
+    "johndoe": ["jadkhalili", "lip.sum"],
+}
+
+# Newest first, as shown on /home.
+notifications = {
+    "jadkhalili": [
+        {
+            "author": "janedoe1",
+            "description": "liked a post you made."
+        },
+        {
+            "author": "doe.jim95",
+            "description": "Messaged you: \"Wanna meet up this weekend?\""
+        },
+        {
+            "author": "johndoe",
+            "description": "turns a year older today. Wish them a happy birthday!"
+        },
+    ],
+    "johndoe": [
+        {
+            "author": "jadkhalili",
+            "description": "Messaged you: \"k\""
+        },
+        {
+            "author": "lip.sum",
+            "description": "tagged you in a post."
+        },
+        {
+            "author": "kwurtea",
+            "description": "Messaged you: \"you there???\""
+        },
+    ],
+}
@@ -0,0 +1,143 @@
+import heapq
+import threading
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+
+class FriendGraph:
+    # Undirected friendship graph as adjacency sets, so an edge check is a
+    # set lookup and mutual friends are a set intersection. Listeners are
+    # called with both usernames after an edge is added or removed.
+    def __init__(self):
+        self._adjacency: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, str], None]] = []
+
+    def subscribe(self, listener: Callable[[str, str], None]) -> None:
+        self._listeners.append(listener)
+
+    def _changed(self, username: str, friend: str) -> None:
+        for listener in self._listeners:
+            listener(username, friend)
+
+    def __contains__(self, username: str) -> bool:
+        return username in self._adjacency
+
+    def __len__(self) -> int:
+        return len(self._adjacency)
+
+    @property
+    def edges(self) -> int:
+        return sum(map(len, self._adjacency.values())) // 2
+
+    def add_friend(self, username: str, friend: str) -> bool:
+        # Returns False if the two already were friends.
+        if username == friend:
+            raise ValueError("Users cannot befriend themselves")
+        with self._lock:
+            friends = self._adjacency.setdefault(username, set())
+            if friend in friends:
+                return False
+            friends.add(friend)
+            self._adjacency.setdefault(friend, set()).add(username)
+        self._changed(username, friend)
+        return True
+
+    def add_many(self, edges: Iterable[Tuple[str, str]]) -> None:
+        # Meant for seeding: listeners are not called.
+        with self._lock:
+            for username, friend in edges:
+                if username != friend:
+                    self._adjacency.setdefault(username, set()).add(friend)
+                    self._adjacency.setdefault(friend, set()).add(username)
+
+    def remove_friend(self, username: str, friend: str) -> bool:
+        with self._lock:
+            friends = self._adjacency.get(username)
+            if friends is None or friend not in friends:
+                return False
+            friends.discard(friend)
+            self._adjacency[friend].discard(username)
+        self._changed(username, friend)
+        return True
+
+    def are_friends(self, username: str, friend: str) -> bool:
+        return friend in self._adjacency.get(username, ())
+
+    def degree(self, username: str) -> int:
+        return len(self._adjacency.get(username, ()))
+
+    def friend_set(self, username: str) -> Set[str]:
+        with self._lock:
+            return set(self._adjacency.get(username, ()))
+
+    def friends(self, username: str) -> List[str]:
+        with self._lock:
+            return sorted(self._adjacency.get(username, ()))
+
+    def _mutual(self, username: str, other: str) -> Set[str]:
+        friends = self._adjacency.get(username, set())
+        others = self._adjacency.get(other, set())
+        # Intersecting from the smaller set keeps this O(min(deg)).
+        if len(friends) > len(others):
+            friends, others = others, friends
+        return friends & others
+
+    def mutual_friends(self, username: str, other: str) -> List[str]:
+        with self._lock:
+            return sorted(self._mutual(username, other))
+
+    def mutual_count(self, username: str, other: str) -> int:
+        with self._lock:
+            return len(self._mutual(username, other))
+
+    def suggestions(
+        self,
+        username: str,
+        limit: int = 10,
+        depth: int = 2,
+        max_visits: int = 100_000,
+    ) -> List[Dict[str, object]]:
+        # Breadth-first walk out to `depth` hops that counts shortest paths
+        # to every non-friend. Closer people rank first, then those reached
+        # through more friends; `max_visits` bounds the walk for hubs.
+        with self._lock:
+            ranked = self._suggestions(username, limit, depth, max_visits)
+
+        return [
+            {"username": candidate, "distance": distance, "paths": -paths}
+            for distance, paths, candidate in heapq.nsmallest(limit, ranked)
+        ]
+
+    def _suggestions(
+        self, username: str, limit: int, depth: int, max_visits: int
+    ) -> List[Tuple[int, int, str]]:
+        friends = self._adjacency.get(username)
+        if not friends:
+            return []
+
+        seen = {username} | friends
+        frontier: Dict[str, int] = {friend: 1 for friend in friends}
+        ranked: List[Tuple[int, int, str]] = []
+        visits = 0
+
+        for distance in range(2, depth + 1):
+            reached: Counter = Counter()
+            for person, paths in frontier.items():
+                for candidate in self._adjacency.get(person, ()):
+                    if candidate not in seen:
+                        reached[candidate] += paths
+                visits += len(self._adjacency.get(person, ()))
+                if visits >= max_visits:
+                    break
+
+            ranked.extend(
+                (distance, -paths, candidate)
+                for candidate, paths in reached.items()
+            )
+            if visits >= max_visits or len(ranked) >= limit:
+                break
+            seen.update(reached)
+            frontier = reached
+
+        return ranked
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from passlib.context import CryptContext
+
+_password_context: Optional[CryptContext] = None
+
+
+def _context() -> CryptContext:
+    global _password_context
+    if _password_context is None:
+        _password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    return _password_context
+
+
+def _hash(plain_password: str) -> Tuple[str, float]:
+    started = time.perf_counter()
+    hashed_password = _context().hash(plain_password)
+    return hashed_password, time.perf_counter() - started
+
+
+def _verify(plain_password: str, hashed_password: str) -> Tuple[bool, float]:
+    started = time.perf_counter()
+    valid = _context().verify(plain_password, hashed_password)
+    return valid, time.perf_counter() - started
+
+
+class HashingOverloadedException(Exception):
+    ...
+
+
+class PasswordHasher:
+    # Runs bcrypt in a process pool sized to the cores. At most `workers`
+    # jobs are handed to the pool at a time; up to `max_pending` more wait
+    # in an admission queue, and anything beyond that is rejected at once
+    # rather than queueing without bound.
+    def __init__(
+        self, workers: Optional[int] = None, max_pending: Optional[int] = None
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * 16
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._pending = 0
+
+        self.completed = 0
+        self.rejected = 0
+        self.queue_wait_total = 0.0
+        self.queue_wait_max = 0.0
+        self.hash_time_total = 0.0
+        self.hash_time_max = 0.0
+
+    async def _run(self, function: Callable, *args: Any) -> Any:
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise HashingOverloadedException()
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            self._slots = asyncio.Semaphore(self.workers)
+
+        self._pending += 1
+        enqueued = time.perf_counter()
+        try:
+            async with self._slots:
+                waited = time.perf_counter() - enqueued
+                loop = asyncio.get_running_loop()
+                result, elapsed = await loop.run_in_executor(
+                    self._executor, function, *args
+                )
+        finally:
+            self._pending -= 1
+
+        self.completed += 1
+        self.queue_wait_total += waited
+        self.queue_wait_max = max(self.queue_wait_max, waited)
+        self.hash_time_total += elapsed
+        self.hash_time_max = max(self.hash_time_max, elapsed)
+
+        return result
+
+    async def hash(self, plain_password: str) -> str:
+        return await self._run(_hash, plain_password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(_verify, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        completed = self.completed or 1
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_avg": self.queue_wait_total / completed,
+            "queue_wait_max": self.queue_wait_max,
+            "hash_time_avg": self.hash_time_total / completed,
+            "hash_time_max": self.hash_time_max,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
@@ -1,51 +1,131 @@
+import asyncio
+import json
 import os
 from datetime import datetime, timedelta
 from typing import List, Optional
 
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, Form, Request, Response, status
+from fastapi import (
+    Depends,
+    FastAPI,
+    Form,
+    HTTPException,
+    Request,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi.responses import (
+    HTMLResponse,
+    PlainTextResponse,
+    RedirectResponse,
+    StreamingResponse,
+)
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi_login.fastapi_login import LoginManager
-from passlib.context import CryptContext
 from pydantic import BaseModel
-
-from db import users
+from starlette.concurrency import run_in_threadpool
+
+from auth import CachingLoginManager
+from broker import Broker, Subscription
+from cache import UserCache
+from db import friends, notifications, users
+from friends import FriendGraph
+from hashing import HashingOverloadedException, PasswordHasher
+from notifications import NotificationStore, decode_cursor, encode_cursor
+from repository import UserExistsException, UserRepository
+from storage import MemoryBackend, create_backend
+from timeline import Timeline
 
 load_dotenv()
 
 SECRET_KEY = os.environ.get("SECRET_KEY")
 ACCESS_TOKEN_EXPIRES_MINUTES = 60
-
-manager = LoginManager(secret=SECRET_KEY, token_url="/login", use_cookie=True)
+NOTIFICATIONS_PAGE_SIZE = 20
+NOTIFICATIONS_KEEPALIVE_SECONDS = 15
+FEED_PAGE_SIZE = 20
+# "sqlite" makes users, friendships and notifications durable and keeps
+# usernames and emails unique across workers; see SqliteBackend for what
+# other workers do and do not see.
+SOCIAL_STORAGE = os.environ.get("SOCIAL_STORAGE", "memory")
+SOCIAL_DB_PATH = os.environ.get("SOCIAL_DB_PATH", "social.db")
+
+manager = CachingLoginManager(
+    secret=SECRET_KEY, token_url="/login", use_cookie=True
+)
 manager.cookie_name = "auth"
 
-password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher()
+storage = create_backend(
+    SOCIAL_STORAGE,
+    SOCIAL_DB_PATH,
+    MemoryBackend(users, friends, notifications),
+)
+user_repository = UserRepository(storage)
+
+
+def load_user(username: str):
+    user = user_repository.get(username)
+    if user is not None:
+        return UserDB(**user)
+
+
+def user_view(user):
+    # UserDB is already validated, so the view skips validation.
+    return User.construct(
+        **{field: getattr(user, field) for field in User.__fields__}
+    )
+
+
+user_cache = UserCache(load_user, user_view)
+user_repository.subscribe(user_cache.invalidate)
+
+friend_graph = FriendGraph()
+friend_graph.add_many(storage.load_friendships())
+
+
+def store_friendship(username: str, friend: str) -> None:
+    storage.set_friendship(
+        username, friend, friend_graph.are_friends(username, friend)
+    )
+
+
+friend_graph.subscribe(store_friendship)
+
+notification_store = NotificationStore()
+for username, author, description in storage.load_notifications():
+    notification_store.add(username, author, description)
+
+
+def store_notification(username: str, item) -> None:
+    storage.add_notification(username, item.authors[-1], item.description)
+
+
+notification_store.subscribe(store_notification)
 
 
 @manager.user_loader()
 def get_user_from_db(username: str):
-    if username in users.keys():
-        return UserDB(**users[username])
+    return user_cache.get(username)
 
 
-def get_hashed_password(plain_password):
-    return password_context.hash(plain_password)
+async def get_hashed_password(plain_password):
+    return await password_hasher.hash(plain_password)
 
 
-def verify_password(plain_password, hashed_password):
-    return password_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    return await password_hasher.verify(plain_password, hashed_password)
 
 
-def authenticate_user(username: str, password: str):
+async def authenticate_user(username: str, password: str):
     user = get_user_from_db(username=username)
     if not user:
         return None
 
-    if not verify_password(
+    if not await verify_password(
         plain_password=password, hashed_password=user.hashed_password
     ):
         return None
@@ -58,19 +138,55 @@ class Notification(BaseModel):
     description: str
 
 
+class Comment(BaseModel):
+    author: str
+    comment: str
+    likes: int
+
+
+class Post(BaseModel):
+    author: str
+    co_author: Optional[str] = None
+    date: str
+    title: str
+    content: str
+    ID: int
+    likes: List[str]
+    comment: List[Comment]
+
+
+class PostCreate(BaseModel):
+    title: str
+    content: str
+    co_author: Optional[str] = None
+
+
 class User(BaseModel):
     name: str
     username: str
     email: str
     birthday: Optional[str] = ""
-    friends: Optional[List[str]] = []
-    notifications: Optional[List[Notification]] = []
 
 
 class UserDB(User):
     hashed_password: str
 
 
+broker = Broker()
+
+
+def publish_notification(username: str, item) -> None:
+    notification = Notification(
+        author=item.author, description=item.description
+    )
+    broker.publish(username, notification.dict())
+
+
+notification_store.subscribe(publish_notification)
+
+timeline = Timeline(friend_graph)
+
+
 app = FastAPI()
 templates = Jinja2Templates(directory="templates")
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -95,11 +211,11 @@ def get_login(request: Request):
 
 
 @app.post("/login")
-def login(
+async def login(
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
 ):
-    user = authenticate_user(
+    user = await authenticate_user(
         username=form_data.username, password=form_data.password
     )
     if not user:
@@ -139,18 +255,252 @@ app.add_exception_handler(
 )
 
 
+def hashing_overloaded_exception_handler(request, exception):
+    return PlainTextResponse(
+        "Too many sign-in attempts right now, please try again shortly.",
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": "1"},
+    )
+
+
+app.add_exception_handler(
+    HashingOverloadedException, hashing_overloaded_exception_handler
+)
+
+
+@app.on_event("shutdown")
+def shutdown():
+    password_hasher.shutdown()
+    storage.close()
+
+
+@app.get("/metrics/hashing")
+def hashing_metrics():
+    return password_hasher.stats()
+
+
+@app.get("/metrics/tokens")
+def token_cache_metrics():
+    return manager.token_cache_stats()
+
+
+@app.get("/metrics/broker")
+def broker_metrics():
+    return broker.stats()
+
+
+@app.get("/metrics/users")
+def user_cache_metrics():
+    return user_cache.stats()
+
+
+def parse_cursor(after: Optional[str]) -> Optional[int]:
+    if after is None:
+        return None
+    try:
+        return decode_cursor(after)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
 @app.get("/home")
-def home(request: Request, user: User = Depends(manager)):
-    user = User(**dict(user))
+def home(
+    request: Request,
+    after: Optional[str] = None,
+    user: User = Depends(manager),
+):
+    page, next_cursor = notification_store.page(
+        user.username,
+        after=parse_cursor(after),
+        number=NOTIFICATIONS_PAGE_SIZE,
+    )
+    unread = notification_store.unread(user.username)
+    notification_store.mark_read(user.username)
+    user = user_cache.view(user.username)
 
     return templates.TemplateResponse(
         "home.html",
-        {"request": request, "title": "FriendConnect - Home", "user": user},
+        {
+            "request": request,
+            "title": "FriendConnect - Home",
+            "user": user,
+            "friends": friend_graph.friends(user.username),
+            "notifications": page,
+            "unread": unread,
+            "next_cursor": next_cursor,
+        },
+    )
+
+
+@app.get("/notifications")
+def get_notifications(
+    after: Optional[str] = None,
+    number: int = NOTIFICATIONS_PAGE_SIZE,
+    user: User = Depends(manager),
+):
+    page, next_cursor = notification_store.page(
+        user.username,
+        after=parse_cursor(after),
+        number=min(max(number, 1), 100),
+    )
+    return {
+        "notifications": page,
+        "unread": notification_store.unread(user.username),
+        "next": next_cursor,
+    }
+
+
+@app.get("/notifications/stream")
+async def stream_notifications(user: User = Depends(manager)):
+    async def events():
+        # Starlette cancels this generator when the client goes away,
+        # which closes the subscription.
+        with broker.subscribe(user.username) as subscription:
+            while True:
+                message = await subscription.get(
+                    timeout=NOTIFICATIONS_KEEPALIVE_SECONDS
+                )
+                dropped = subscription.take_dropped()
+                if dropped:
+                    yield f"event: overflow\ndata: {dropped}\n\n"
+                if message is None:
+                    yield ": keepalive\n\n"
+                else:
+                    data = json.dumps(message)
+                    yield f"event: notification\ndata: {data}\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+async def close_on_disconnect(
+    websocket: WebSocket, subscription: Subscription
+):
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscription.close()
+
+
+@app.websocket("/notifications/ws")
+async def notifications_websocket(websocket: WebSocket):
+    token = websocket.cookies.get(manager.cookie_name)
+    try:
+        if token is None:
+            raise NotAuthenticatedException()
+        user = await manager.get_current_user(token)
+    except NotAuthenticatedException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    with broker.subscribe(user.username) as subscription:
+        receiver = asyncio.ensure_future(
+            close_on_disconnect(websocket, subscription)
+        )
+        try:
+            while True:
+                message = await subscription.get()
+                if message is None:
+                    break
+                dropped = subscription.take_dropped()
+                if dropped:
+                    await websocket.send_json(
+                        {"event": "overflow", "dropped": dropped}
+                    )
+                await websocket.send_json(
+                    {"event": "notification", "data": message}
+                )
+        finally:
+            receiver.cancel()
+
+
+@app.post("/posts", status_code=status.HTTP_201_CREATED)
+def create_post(post: PostCreate, user: User = Depends(manager)):
+    date = datetime.now().strftime("%d/%m/%Y")
+
+    return timeline.add(
+        user.username,
+        lambda id: Post(
+            author=user.username,
+            co_author=post.co_author,
+            date=date,
+            title=post.title,
+            content=post.content,
+            ID=id,
+            likes=[],
+            comment=[],
+        ),
     )
 
 
+@app.get("/feed")
+def get_feed(
+    after: Optional[str] = None,
+    number: int = FEED_PAGE_SIZE,
+    user: User = Depends(manager),
+):
+    posts, last = timeline.feed(
+        user.username,
+        after=parse_cursor(after),
+        number=min(max(number, 1), 100),
+    )
+    return {
+        "posts": posts,
+        "next": None if last is None else encode_cursor(last),
+    }
+
+
+@app.get("/friends/suggestions")
+def get_friend_suggestions(
+    limit: int = 10,
+    depth: int = 2,
+    user: User = Depends(manager),
+):
+    return {
+        "suggestions": friend_graph.suggestions(
+            user.username, limit=min(max(limit, 1), 50), depth=min(depth, 3)
+        )
+    }
+
+
+@app.get("/friends/{username}")
+def get_friendship(username: str, user: User = Depends(manager)):
+    mutual = friend_graph.mutual_friends(user.username, username)
+    return {
+        "username": username,
+        "friends": friend_graph.are_friends(user.username, username),
+        "mutual": mutual,
+        "mutual_count": len(mutual),
+    }
+
+
+@app.post("/friends/{username}")
+def add_friend(username: str, user: User = Depends(manager)):
+    if username == user.username or username not in user_repository:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+        )
+
+    if friend_graph.add_friend(user.username, username):
+        notification_store.add(
+            username, user.username, "added you as a friend."
+        )
+
+    return RedirectResponse("/home", status_code=status.HTTP_302_FOUND)
+
+
 @app.get("/logout", response_class=RedirectResponse)
-def logout():
+def logout(request: Request):
+    manager.revoke(request.cookies.get(manager.cookie_name))
     response = RedirectResponse("/")
     manager.set_cookie(response, None)
 
@@ -168,44 +518,50 @@ def get_register(request: Request):
     )
 
 
+def invalid_registration(request: Request):
+    return templates.TemplateResponse(
+        "register.html",
+        {
+            "request": request,
+            "title": "FriendConnect - Register",
+            "invalid": False,
+        },
+        status_code=status.HTTP_400_BAD_REQUEST,
+    )
+
+
 @app.post(
     "/register",
 )
-def register(
+async def register(
     request: Request,
     username: str = Form(...),
     name: str = Form(...),
     password: str = Form(...),
     email: str = Form(...),
 ):
-    hashed_password = get_hashed_password(password)
-    invalid = False
-
-    for db_username in users.keys():
-        if username == db_username:
-            invalid = True
-        elif users[db_username]["email"] == email:
-            invalid = True
-
-    if invalid:
-        return templates.TemplateResponse(
-            "register.html",
-            {
-                "request": request,
-                "title": "FriendConnect - Register",
-                "invalid": False,
-            },
-            status_code=status.HTTP_400_BAD_REQUEST,
+    # Fail fast before paying for a hash; the insert below re-checks
+    # atomically in case a concurrent registration got there first.
+    if not user_repository.is_available(username, email):
+        return invalid_registration(request)
+
+    hashed_password = await get_hashed_password(password)
+
+    try:
+        # Waits for the backend's commit, so keep it off the event loop.
+        await run_in_threadpool(
+            user_repository.add,
+            jsonable_encoder(
+                UserDB(
+                    username=username,
+                    name=name,
+                    hashed_password=hashed_password,
+                    email=email,
+                )
+            ),
         )
-
-    users[username] = jsonable_encoder(
-        UserDB(
-            username=username,
-            name=name,
-            hashed_password=hashed_password,
-            email=email,
-        )
-    )
+    except UserExistsException:
+        return invalid_registration(request)
 
     response = RedirectResponse("/login", status_code=status.HTTP_302_FOUND)
     manager.set_cookie(response, None)
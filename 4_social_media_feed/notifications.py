@@ -0,0 +1,182 @@
+import base64
+import bisect
+import threading
+from collections import deque
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Tuple,
+)
+
+
+def encode_cursor(seq: int) -> str:
+    return base64.urlsafe_b64encode(str(seq).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+class NotificationItem:
+    # One entry of a user's feed. Repeats of the same description are
+    # folded into a single item that lists every author.
+    __slots__ = ("seq", "authors", "description")
+
+    def __init__(self, seq: int, author: str, description: str):
+        self.seq = seq
+        self.authors = [author]
+        self.description = description
+
+    @property
+    def author(self) -> str:
+        if len(self.authors) == 1:
+            return self.authors[0]
+        others = len(self.authors) - 1
+        return (
+            f"{self.authors[-1]} and {others} "
+            f"{'other' if others == 1 else 'others'}"
+        )
+
+    def to_dict(self, read_upto: int) -> Dict[str, Any]:
+        return {
+            "author": self.author,
+            "authors": list(self.authors),
+            "description": self.description,
+            "unread": self.seq > read_upto,
+        }
+
+
+class _Inbox:
+    __slots__ = ("recent", "latest", "archive", "archive_seqs", "seq")
+
+    def __init__(self, capacity: int):
+        # Newest last. Items pushed out of the ring go to the archive, which
+        # stays sorted by seq because seqs only grow.
+        self.recent: Deque[NotificationItem] = deque(maxlen=capacity)
+        self.latest: Dict[str, NotificationItem] = {}
+        self.archive: List[NotificationItem] = []
+        self.archive_seqs: List[int] = []
+        self.seq = 0
+
+
+class NotificationStore:
+    # Per-user notifications: a bounded ring of recent items plus an
+    # archive of everything older. Unread state is a seq watermark and a
+    # counter, so reading the badge and marking all read are O(1).
+    # Listeners are called with the username and item after every add.
+    def __init__(self, capacity: int = 100):
+        self.capacity = capacity
+        self._inboxes: Dict[str, _Inbox] = {}
+        self._read_upto: Dict[str, int] = {}
+        self._unread: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, NotificationItem], None]] = []
+
+    def subscribe(
+        self, listener: Callable[[str, NotificationItem], None]
+    ) -> None:
+        self._listeners.append(listener)
+
+    def _inbox(self, username: str) -> _Inbox:
+        inbox = self._inboxes.get(username)
+        if inbox is None:
+            inbox = self._inboxes[username] = _Inbox(self.capacity)
+        return inbox
+
+    def add(
+        self, username: str, author: str, description: str
+    ) -> NotificationItem:
+        item = self._add(username, author, description)
+        for listener in self._listeners:
+            listener(username, item)
+        return item
+
+    def _add(
+        self, username: str, author: str, description: str
+    ) -> NotificationItem:
+        with self._lock:
+            inbox = self._inbox(username)
+            inbox.seq += 1
+            read_upto = self._read_upto.get(username, 0)
+
+            item = inbox.latest.get(description)
+            if item is not None:
+                # Fold the repeat into the existing item and move it to the
+                # top; the ring is bounded, so the removal is too.
+                inbox.recent.remove(item)
+                was_unread = item.seq > read_upto
+                if author in item.authors:
+                    item.authors.remove(author)
+                item.authors.append(author)
+                item.seq = inbox.seq
+                inbox.recent.append(item)
+                if not was_unread:
+                    self._unread[username] = self._unread.get(username, 0) + 1
+                return item
+
+            if len(inbox.recent) == inbox.recent.maxlen:
+                oldest = inbox.recent[0]
+                inbox.archive.append(oldest)
+                inbox.archive_seqs.append(oldest.seq)
+                if inbox.latest.get(oldest.description) is oldest:
+                    del inbox.latest[oldest.description]
+
+            item = NotificationItem(inbox.seq, author, description)
+            inbox.recent.append(item)
+            inbox.latest[description] = item
+            self._unread[username] = self._unread.get(username, 0) + 1
+            return item
+
+    def add_many(
+        self, username: str, notifications: Iterable[Tuple[str, str]]
+    ) -> None:
+        for author, description in notifications:
+            self.add(username, author, description)
+
+    def unread(self, username: str) -> int:
+        return self._unread.get(username, 0)
+
+    def mark_read(self, username: str) -> None:
+        with self._lock:
+            inbox = self._inboxes.get(username)
+            if inbox is not None:
+                self._read_upto[username] = inbox.seq
+            self._unread[username] = 0
+
+    def page(
+        self, username: str, after: Optional[int] = None, number: int = 20
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        # Newest first. `after` is the seq of the last item already shown;
+        # returns the page and the cursor for the next one, if any.
+        with self._lock:
+            inbox = self._inboxes.get(username)
+            if inbox is None:
+                return [], None
+            read_upto = self._read_upto.get(username, 0)
+            limit = inbox.seq + 1 if after is None else after
+
+            items: List[NotificationItem] = []
+            for item in reversed(inbox.recent):
+                if len(items) > number:
+                    break
+                if item.seq < limit:
+                    items.append(item)
+
+            end = bisect.bisect_left(inbox.archive_seqs, limit)
+            start = max(end - (number + 1 - len(items)), 0)
+            items.extend(reversed(inbox.archive[start:end]))
+
+            more = len(items) > number
+            items = items[:number]
+            page = [item.to_dict(read_upto) for item in items]
+
+        next_cursor = encode_cursor(items[-1].seq) if more else None
+        return page, next_cursor
@@ -0,0 +1,101 @@
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+def normalise_email(email: str) -> str:
+    return email.strip().lower()
+
+
+class UserExistsException(Exception):
+    ...
+
+
+class UserRepository:
+    # Users keyed by username, with a hash index on the normalised email,
+    # in front of a storage backend. A new user is reserved in the indexes
+    # under the lock, so two registrations for the same email cannot both
+    # pass, and is only kept once the backend has stored it; the backend's
+    # own constraints catch clashes with other workers. Users this worker
+    # has not seen are read through to the backend; users it holds are not
+    # refreshed, so another worker's updates to them are not picked up.
+    # Listeners are called with the username after every write to that user.
+    def __init__(self, backend: Any):
+        self.backend = backend
+        self._users = backend.load_users()
+        self._emails: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str], None]] = []
+
+        for username, user in self._users.items():
+            self._emails[normalise_email(user["email"])] = username
+
+    def __contains__(self, username: str) -> bool:
+        return self.get(username) is not None
+
+    def __len__(self) -> int:
+        return len(self._users)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._users)
+
+    def subscribe(self, listener: Callable[[str], None]) -> None:
+        self._listeners.append(listener)
+
+    def _changed(self, username: str) -> None:
+        for listener in self._listeners:
+            listener(username)
+
+    def get(self, username: str) -> Optional[Dict[str, Any]]:
+        user = self._users.get(username)
+        if user is None:
+            # Possibly registered through another worker.
+            user = self.backend.get_user(username)
+            if user is not None:
+                with self._lock:
+                    self._users.setdefault(username, user)
+                    self._emails.setdefault(
+                        normalise_email(user["email"]), username
+                    )
+        return user
+
+    def get_by_email(self, email: str) -> Optional[Dict[str, Any]]:
+        username = self._emails.get(normalise_email(email))
+        return None if username is None else self._users[username]
+
+    def is_available(self, username: str, email: str) -> bool:
+        return (
+            username not in self._users
+            and normalise_email(email) not in self._emails
+        )
+
+    def add(self, user: Dict[str, Any]) -> None:
+        username = user["username"]
+        email = normalise_email(user["email"])
+        with self._lock:
+            if username in self._users or email in self._emails:
+                raise UserExistsException()
+            self._users[username] = user
+            self._emails[email] = username
+
+        try:
+            self.backend.insert_user(user)
+        except Exception:
+            with self._lock:
+                del self._users[username]
+                del self._emails[email]
+            raise
+        self._changed(username)
+
+    def update(self, username: str, changes: Dict[str, Any]) -> None:
+        with self._lock:
+            user = self._users[username]
+            if "email" in changes:
+                email = normalise_email(changes["email"])
+                owner = self._emails.get(email)
+                if owner is not None and owner != username:
+                    raise UserExistsException()
+                del self._emails[normalise_email(user["email"])]
+                self._emails[email] = username
+            user = self._users[username] = {**user, **changes}
+            self.backend.update_user(user)
+        self._changed(username)
@@ -0,0 +1,317 @@
+import atexit
+import json
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from repository import UserExistsException, normalise_email
+
+
+class MemoryBackend:
+    # Keeps nothing beyond the process: the seed data is the whole store.
+    def __init__(
+        self,
+        users: Dict[str, Dict[str, Any]],
+        friends: Dict[str, List[str]],
+        notifications: Dict[str, List[Dict[str, str]]],
+    ):
+        self._users = users
+        self._friends = friends
+        self._notifications = notifications
+
+    def load_users(self) -> Dict[str, Dict[str, Any]]:
+        return self._users
+
+    def load_friendships(self) -> Iterable[Tuple[str, str]]:
+        return [
+            (username, friend)
+            for username, friends in self._friends.items()
+            for friend in friends
+        ]
+
+    def load_notifications(self) -> Iterable[Tuple[str, str, str]]:
+        # Oldest first, so replaying them rebuilds the store.
+        return [
+            (username, item["author"], item["description"])
+            for username, items in self._notifications.items()
+            for item in reversed(items)
+        ]
+
+    def get_user(self, username: str) -> Optional[Dict[str, Any]]:
+        return None
+
+    def insert_user(self, user: Dict[str, Any]) -> None:
+        ...
+
+    def update_user(self, user: Dict[str, Any]) -> None:
+        ...
+
+    def set_friendship(self, username: str, friend: str, value: bool) -> None:
+        ...
+
+    def add_notification(
+        self, username: str, author: str, description: str
+    ) -> None:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    email TEXT NOT NULL UNIQUE,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS friendships (
+    username TEXT NOT NULL,
+    friend TEXT NOT NULL,
+    PRIMARY KEY (username, friend)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS notifications (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    author TEXT NOT NULL,
+    description TEXT NOT NULL
+);
+"""
+
+_STOP = object()
+
+
+class SqliteBackend:
+    # SQLite in WAL mode. Every write goes through one writer thread that
+    # commits whatever has queued up as a single transaction, so many
+    # concurrent writers share one fsync. User inserts wait for their
+    # commit, because the UNIQUE constraints are what keep usernames and
+    # emails unique across workers; everything else is fire and forget.
+    #
+    # Sharing between workers stops there: a worker reads users it has not
+    # seen yet through to the file, but loads friendships and notifications
+    # only at startup and never re-reads a user it already holds. Changes
+    # made by another worker to those show up after a restart, so run a
+    # single worker unless that is acceptable.
+    def __init__(self, path: str, batch_size: int = 256, seed: Any = None):
+        self.path = path
+        self.batch_size = batch_size
+        self._writes: "queue.Queue" = queue.Queue()
+        self._local = threading.local()
+        self._closed = False
+
+        connection = self._connect()
+        connection.executescript(_SCHEMA)
+        exists = connection.execute("SELECT 1 FROM users LIMIT 1").fetchone()
+        if exists is None and seed is not None:
+            self._seed(connection, seed)
+
+        self._writer = threading.Thread(
+            target=self._write_loop, name="social-storage", daemon=True
+        )
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=FULL")
+        connection.execute("PRAGMA busy_timeout=5000")
+        return connection
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def _seed(self, connection: sqlite3.Connection, seed: Any) -> None:
+        connection.execute("BEGIN")
+        connection.executemany(
+            "INSERT INTO users VALUES (?, ?, ?)",
+            (
+                (username, normalise_email(user["email"]), json.dumps(user))
+                for username, user in seed.load_users().items()
+            ),
+        )
+        connection.executemany(
+            "INSERT OR IGNORE INTO friendships VALUES (?, ?)",
+            _ordered(seed.load_friendships()),
+        )
+        connection.executemany(
+            "INSERT INTO notifications (username, author, description) "
+            "VALUES (?, ?, ?)",
+            seed.load_notifications(),
+        )
+        connection.execute("COMMIT")
+
+    def _write_loop(self) -> None:
+        connection = self._connect()
+        stopping = False
+        while not stopping:
+            batch = [self._writes.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._writes.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [write for write in batch if write is not _STOP]
+
+            try:
+                results = self._commit(connection, batch)
+            except Exception as error:
+                # Anything failing outside a single statement fails the
+                # whole batch, but the writer has to live on: callers are
+                # waiting on these futures and on the ones still queued.
+                results = [(future, error) for _, _, future in batch]
+                connection = self._recover(connection)
+
+            for future, error in results:
+                if future is None:
+                    continue
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+        connection.close()
+
+    def _commit(
+        self, connection: sqlite3.Connection, batch: List[tuple]
+    ) -> List[Tuple[Optional[Future], Optional[Exception]]]:
+        results = []
+        connection.execute("BEGIN")
+        for sql, parameters, future in batch:
+            try:
+                connection.execute(sql, parameters)
+                results.append((future, None))
+            except sqlite3.Error as error:
+                results.append((future, error))
+        try:
+            connection.execute("COMMIT")
+        except sqlite3.Error as error:
+            connection.execute("ROLLBACK")
+            results = [(future, error) for future, _ in results]
+        return results
+
+    def _recover(self, connection: sqlite3.Connection) -> sqlite3.Connection:
+        # Rolls back whatever is left open, or failing that starts over on
+        # a new connection; a failed reconnect is retried on the next batch.
+        try:
+            if connection.in_transaction:
+                connection.execute("ROLLBACK")
+            return connection
+        except Exception:
+            connection.close()
+        try:
+            return self._connect()
+        except sqlite3.Error:
+            return connection
+
+    def _write(self, sql: str, parameters: tuple, wait: bool = False) -> None:
+        if self._closed:
+            raise RuntimeError("Storage is closed")
+        future: Optional[Future] = Future() if wait else None
+        self._writes.put((sql, parameters, future))
+        if future is not None:
+            future.result()
+
+    def load_users(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            username: json.loads(data)
+            for username, data in self._reader().execute(
+                "SELECT username, data FROM users"
+            )
+        }
+
+    def load_friendships(self) -> Iterable[Tuple[str, str]]:
+        return self._reader().execute(
+            "SELECT username, friend FROM friendships"
+        ).fetchall()
+
+    def load_notifications(self) -> Iterable[Tuple[str, str, str]]:
+        return self._reader().execute(
+            "SELECT username, author, description FROM notifications "
+            "ORDER BY id"
+        ).fetchall()
+
+    def get_user(self, username: str) -> Optional[Dict[str, Any]]:
+        row = (
+            self._reader()
+            .execute("SELECT data FROM users WHERE username = ?", (username,))
+            .fetchone()
+        )
+        return None if row is None else json.loads(row[0])
+
+    def insert_user(self, user: Dict[str, Any]) -> None:
+        try:
+            self._write(
+                "INSERT INTO users VALUES (?, ?, ?)",
+                (
+                    user["username"],
+                    normalise_email(user["email"]),
+                    json.dumps(user),
+                ),
+                wait=True,
+            )
+        except sqlite3.IntegrityError:
+            raise UserExistsException()
+
+    def update_user(self, user: Dict[str, Any]) -> None:
+        self._write(
+            "UPDATE users SET email = ?, data = ? WHERE username = ?",
+            (
+                normalise_email(user["email"]),
+                json.dumps(user),
+                user["username"],
+            ),
+            wait=True,
+        )
+
+    def set_friendship(self, username: str, friend: str, value: bool) -> None:
+        username, friend = sorted((username, friend))
+        if value:
+            self._write(
+                "INSERT OR IGNORE INTO friendships VALUES (?, ?)",
+                (username, friend),
+            )
+        else:
+            self._write(
+                "DELETE FROM friendships WHERE username = ? AND friend = ?",
+                (username, friend),
+            )
+
+    def add_notification(
+        self, username: str, author: str, description: str
+    ) -> None:
+        self._write(
+            "INSERT INTO notifications (username, author, description) "
+            "VALUES (?, ?, ?)",
+            (username, author, description),
+        )
+
+    def close(self) -> None:
+        # Waits for queued writes to commit; safe to call more than once.
+        if self._closed:
+            return
+        self._closed = True
+        self._writes.put(_STOP)
+        self._writer.join()
+
+
+def create_backend(name: str, path: str, seed: MemoryBackend) -> Any:
+    # The seed doubles as the memory backend, and fills a new SQLite file.
+    if name == "memory":
+        return seed
+    if name == "sqlite":
+        return SqliteBackend(path, seed=seed)
+    raise ValueError(f"Unknown storage backend: {name!r}")
+
+
+def _ordered(edges: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    # Friendships are undirected; store each pair once, sorted.
+    return [tuple(sorted(edge)) for edge in edges]
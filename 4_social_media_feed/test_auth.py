@@ -0,0 +1,79 @@
+import time
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+import auth
+from auth import CachingLoginManager
+
+
+class Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(auth, "time", clock)
+    return clock
+
+
+def login_manager(**kwargs) -> CachingLoginManager:
+    return CachingLoginManager(secret="secret", token_url="/login", **kwargs)
+
+
+def token(manager: CachingLoginManager, username: str) -> str:
+    return manager.create_access_token(
+        data={"sub": username}, expires=timedelta(minutes=5)
+    )
+
+
+def test_verified_tokens_are_cached():
+    manager = login_manager()
+    first = token(manager, "a")
+
+    assert manager._get_payload(first)["sub"] == "a"
+    assert manager._get_payload(first)["sub"] == "a"
+    stats = manager.token_cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+    with pytest.raises(HTTPException):
+        manager._get_payload(first + "x")
+
+
+def test_cache_is_bounded():
+    manager = login_manager(token_cache_size=2)
+    for username in ("a", "b", "c"):
+        manager._get_payload(token(manager, username))
+    assert manager.token_cache_stats()["size"] == 2
+
+
+@pytest.mark.parametrize("cached", [True, False])
+def test_revoked_tokens_are_refused(cached):
+    manager = login_manager()
+    revoked, other = token(manager, "a"), token(manager, "b")
+    if cached:
+        manager._get_payload(revoked)
+
+    manager.revoke(revoked)
+    with pytest.raises(HTTPException):
+        manager._get_payload(revoked)
+    assert manager._get_payload(other)["sub"] == "b"
+    assert manager.token_cache_stats()["revoked"] == 1
+
+
+def test_revocations_are_dropped_once_tokens_expire(clock):
+    manager = login_manager()
+    manager.revoke(token(manager, "a"))
+    manager.revoke(None)
+    manager.revoke("not a token")
+    assert manager.token_cache_stats()["revoked"] == 1
+
+    clock.now += 10 * 60
+    manager.revoke(token(manager, "b"))
+    assert manager.token_cache_stats()["revoked"] == 1
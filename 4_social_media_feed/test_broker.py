@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+from broker import Broker
+
+
+def test_slow_subscribers_drop_the_oldest_messages():
+    async def scenario():
+        broker = Broker(maxsize=3)
+        with broker.subscribe("a") as subscription:
+            for message in range(5):
+                broker.publish("a", message)
+
+            assert subscription.take_dropped() == 2
+            assert subscription.take_dropped() == 0
+            received = [await subscription.get(timeout=1) for _ in range(3)]
+            assert received == [2, 3, 4]
+            assert await subscription.get(timeout=0.01) is None
+
+    asyncio.run(scenario())
+
+
+def test_publish_from_other_threads_is_delivered_on_the_loop():
+    async def scenario():
+        broker = Broker()
+        subscription = broker.subscribe("a")
+        other = broker.subscribe("b")
+        threads = [
+            threading.Thread(target=broker.publish, args=("a", number))
+            for number in range(10)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        received = [await subscription.get(timeout=1) for _ in range(10)]
+        assert sorted(received) == list(range(10))
+        assert await other.get(timeout=0.01) is None
+        assert broker.stats()["delivered"] == 10
+
+    asyncio.run(scenario())
+
+
+def test_closing_unsubscribes_and_wakes_the_reader():
+    async def scenario():
+        broker = Broker()
+        subscription = broker.subscribe("a")
+        reader = asyncio.ensure_future(subscription.get())
+        await asyncio.sleep(0)
+
+        subscription.close()
+        assert await asyncio.wait_for(reader, 1) is None
+        broker.publish("a", "late")
+        assert broker.stats() == {
+            "topics": 0,
+            "subscriptions": 0,
+            "published": 1,
+            "delivered": 0,
+        }
+
+    asyncio.run(scenario())
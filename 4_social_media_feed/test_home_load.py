@@ -0,0 +1,72 @@
+import os
+import statistics
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+LOGIN = {"username": "storm", "password": "storm-password"}
+
+
+@pytest.fixture(scope="module")
+def client():
+    os.environ.setdefault("SECRET_KEY", "test-secret")
+    from main import app
+
+    with TestClient(app) as client:
+        client.post(
+            "/register",
+            data={**LOGIN, "name": "Storm", "email": "storm@email.com"},
+            allow_redirects=False,
+        )
+        response = client.post("/login", data=LOGIN, allow_redirects=False)
+        client.cookies.set("auth", response.cookies["auth"])
+        yield client
+
+
+def home_latencies(client: TestClient, requests: int, seconds: float = 5):
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while len(latencies) < requests and time.monotonic() < deadline:
+        start = time.perf_counter()
+        assert client.get("/home").status_code == 200
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def test_home_stays_fast_during_a_login_storm(client):
+    from main import password_hasher
+
+    home_latencies(client, 20)
+    quiet = home_latencies(client, 100)
+
+    stop = threading.Event()
+    logins = []
+
+    def log_in():
+        while not stop.is_set():
+            response = client.post("/login", data=LOGIN, allow_redirects=False)
+            logins.append(response.status_code)
+
+    storm = [threading.Thread(target=log_in) for _ in range(8)]
+    for thread in storm:
+        thread.start()
+    try:
+        # Let the hashing queue fill up before measuring.
+        deadline = time.monotonic() + 10
+        while password_hasher.stats()["pending"] < len(storm) // 2:
+            if time.monotonic() > deadline:
+                break
+            time.sleep(0.01)
+        during = home_latencies(client, 100)
+        pending = password_hasher.stats()["pending"]
+    finally:
+        stop.set()
+        for thread in storm:
+            thread.join()
+
+    assert pending > 0 and logins and set(logins) <= {302, 503}
+    # bcrypt runs in the process pool, so /home only competes with it for
+    # CPU; inline hashing would hold each request behind whole hashes.
+    assert statistics.median(during) < 3 * statistics.median(quiet) + 0.02
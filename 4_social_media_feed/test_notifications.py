@@ -0,0 +1,87 @@
+from notifications import NotificationStore, decode_cursor
+
+
+def all_pages(store: NotificationStore, username: str, number: int):
+    pages = []
+    after = None
+    while True:
+        page, cursor = store.page(username, after=after, number=number)
+        pages.append([item["description"] for item in page])
+        if cursor is None:
+            return pages
+        after = decode_cursor(cursor)
+
+
+def test_pages_cover_ring_and_archive_newest_first():
+    store = NotificationStore(capacity=5)
+    for index in range(23):
+        store.add("a", "b", f"event {index}")
+
+    pages = all_pages(store, "a", number=4)
+    assert [len(page) for page in pages] == [4, 4, 4, 4, 4, 3]
+    assert sum(pages, []) == [f"event {index}" for index in range(22, -1, -1)]
+    assert store.page("nobody") == ([], None)
+
+
+def test_cursor_is_stable_under_new_items():
+    store = NotificationStore(capacity=3)
+    for index in range(6):
+        store.add("a", "b", f"event {index}")
+
+    first, cursor = store.page("a", number=2)
+    store.add("a", "b", "newer")
+    second, _ = store.page("a", after=decode_cursor(cursor), number=2)
+    assert [item["description"] for item in first + second] == [
+        "event 5",
+        "event 4",
+        "event 3",
+        "event 2",
+    ]
+
+
+def test_repeats_are_folded_and_moved_to_the_top():
+    store = NotificationStore()
+    store.add("a", "x", "liked a post you made.")
+    store.add("a", "y", "tagged you in a post.")
+    store.add("a", "y", "liked a post you made.")
+    store.add("a", "z", "liked a post you made.")
+    store.add("a", "x", "liked a post you made.")
+
+    page, cursor = store.page("a")
+    assert cursor is None
+    assert [item["description"] for item in page] == [
+        "liked a post you made.",
+        "tagged you in a post.",
+    ]
+    assert page[0]["authors"] == ["y", "z", "x"]
+    assert page[0]["author"] == "x and 2 others"
+
+
+def test_items_pushed_to_the_archive_are_not_folded_into():
+    store = NotificationStore(capacity=2)
+    store.add("a", "x", "liked a post you made.")
+    store.add("a", "y", "one")
+    store.add("a", "z", "two")
+    store.add("a", "w", "liked a post you made.")
+
+    descriptions = [item["description"] for item in store.page("a")[0]]
+    assert descriptions.count("liked a post you made.") == 2
+
+
+def test_unread_counter():
+    store = NotificationStore()
+    store.add("a", "x", "liked a post you made.")
+    store.add("a", "y", "one")
+    assert store.unread("a") == 2
+    # Folding into an unread item adds nothing to the badge.
+    store.add("a", "z", "one")
+    assert store.unread("a") == 2
+
+    store.mark_read("a")
+    assert store.unread("a") == 0
+    assert not any(item["unread"] for item in store.page("a")[0])
+
+    store.add("a", "w", "liked a post you made.")
+    assert store.unread("a") == 1
+    page = store.page("a")[0]
+    assert [item["unread"] for item in page] == [True, False]
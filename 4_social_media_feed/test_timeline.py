@@ -0,0 +1,91 @@
+import random
+import threading
+from types import SimpleNamespace
+
+from friends import FriendGraph
+from timeline import Timeline
+
+USERS = [f"user{index}" for index in range(12)]
+
+
+def post(author: str):
+    return lambda id: SimpleNamespace(ID=id, author=author)
+
+
+def pages(timeline: Timeline, username: str, number: int):
+    ids = []
+    after = None
+    while True:
+        page, after = timeline.feed(username, after=after, number=number)
+        ids.extend(item.ID for item in page)
+        if after is None:
+            return ids
+
+
+def brute_force(timeline: Timeline, graph: FriendGraph, username: str):
+    authors = graph.friend_set(username) | {username}
+    return sorted(
+        (id for id, item in timeline._posts.items() if item.author in authors),
+        reverse=True,
+    )
+
+
+def test_feed_matches_brute_force():
+    rng = random.Random(11)
+    graph = FriendGraph()
+    # A low threshold and small inboxes, so celebrities, inbox floors and
+    # rebuilt inboxes all come up.
+    timeline = Timeline(graph, celebrity_threshold=4, inbox_size=5)
+
+    for _ in range(1500):
+        action = rng.random()
+        username, other = rng.sample(USERS, 2)
+        if action < 0.6:
+            timeline.add(username, post(username))
+        elif action < 0.75:
+            graph.add_friend(username, other)
+        elif action < 0.85:
+            graph.remove_friend(username, other)
+        else:
+            number = rng.randint(1, 7)
+            assert pages(timeline, username, number) == brute_force(
+                timeline, graph, username
+            )
+
+    for username in USERS:
+        expected = brute_force(timeline, graph, username)
+        for number in (1, 3, 20):
+            assert pages(timeline, username, number) == expected
+
+
+def test_concurrent_posts_keep_feeds_complete():
+    graph = FriendGraph()
+    graph.add_many(
+        (username, other)
+        for index, username in enumerate(USERS)
+        for other in USERS[index + 1 :]
+    )
+    timeline = Timeline(graph, celebrity_threshold=100, inbox_size=50)
+    for username in USERS:
+        timeline.feed(username)
+
+    def write(author: str):
+        for _ in range(200):
+            timeline.add(author, post(author))
+
+    def read():
+        for _ in range(50):
+            for username in USERS:
+                timeline.feed(username, number=10)
+
+    threads = [threading.Thread(target=write, args=(u,)) for u in USERS]
+    threads.append(threading.Thread(target=read))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for username in USERS:
+        expected = brute_force(timeline, graph, username)
+        assert len(expected) == 200 * len(USERS)
+        assert pages(timeline, username, 30) == expected
@@ -0,0 +1,176 @@
+import bisect
+import heapq
+import itertools
+import threading
+from collections import deque
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
+
+from friends import FriendGraph
+
+
+def _below(log: List[int], limit: int) -> Iterator[int]:
+    # Ids of an ascending log that are under `limit`, newest first.
+    for index in range(bisect.bisect_left(log, limit) - 1, -1, -1):
+        yield log[index]
+
+
+class _Inbox:
+    __slots__ = ("ids", "floor")
+
+    def __init__(self, ids: List[int], size: int, floor: int):
+        # Post ids from friends below the celebrity threshold, ascending.
+        # Every such post with an id >= floor is here; older ones have to
+        # be pulled from the authors' logs.
+        self.ids: Deque[int] = deque(ids, maxlen=size)
+        self.floor = floor
+
+    def append(self, id: int) -> None:
+        if len(self.ids) == self.ids.maxlen:
+            self.floor = self.ids[1]
+        self.ids.append(id)
+
+
+class Timeline:
+    # Posts in per-author, id-ordered logs; ids only grow, so id order is
+    # time order. A feed is a k-way merge of the logs of a user's friends.
+    # Posts by authors with fewer than `celebrity_threshold` friends are
+    # also pushed into the materialised inboxes of their friends, so most
+    # of a feed comes from one list; celebrities' logs are merged in at
+    # read time instead of being copied to every follower.
+    def __init__(
+        self,
+        graph: FriendGraph,
+        celebrity_threshold: int = 1000,
+        inbox_size: int = 500,
+    ):
+        self.graph = graph
+        self.celebrity_threshold = celebrity_threshold
+        self.inbox_size = inbox_size
+        self._posts: Dict[int, Any] = {}
+        self._logs: Dict[str, List[int]] = {}
+        self._inboxes: Dict[str, _Inbox] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        graph.subscribe(self._friendship_changed)
+
+    def _friendship_changed(self, username: str, friend: str) -> None:
+        # Inboxes are rebuilt from the logs on the next read. Someone who
+        # just dropped below the threshold has posts missing from every
+        # friend's inbox, so all of those go too.
+        stale = {username, friend}
+        for user in (username, friend):
+            if self.graph.degree(user) == self.celebrity_threshold - 1:
+                stale.update(self.graph.friend_set(user))
+        with self._lock:
+            for user in stale:
+                self._inboxes.pop(user, None)
+
+    def _is_celebrity(self, username: str) -> bool:
+        return self.graph.degree(username) >= self.celebrity_threshold
+
+    def get(self, id: int) -> Optional[Any]:
+        return self._posts.get(id)
+
+    def add(self, author: str, build: Callable[[int], Any]) -> Any:
+        # Builds the post from its id with `build` and stores it. The id is
+        # taken under the lock, so logs and inboxes only ever see ids in
+        # ascending order. Friends are read under it too: a friendship
+        # change drops inboxes only after taking the lock, so it cannot
+        # land between reading them and filling the inboxes. The graph
+        # calls its listeners outside its own lock, so this nesting is safe.
+        with self._lock:
+            friends = (
+                ()
+                if self._is_celebrity(author)
+                else self.graph.friend_set(author)
+            )
+            post = build(next(self._ids))
+            self._posts[post.ID] = post
+            self._logs.setdefault(author, []).append(post.ID)
+
+            for friend in friends:
+                inbox = self._inboxes.get(friend)
+                if inbox is not None:
+                    inbox.append(post.ID)
+        return post
+
+    def _inbox(self, username: str, friends: List[str]) -> _Inbox:
+        inbox = self._inboxes.get(username)
+        if inbox is None:
+            recent = list(
+                itertools.islice(
+                    heapq.merge(
+                        *(
+                            reversed(self._logs.get(friend, ()))
+                            for friend in friends
+                        ),
+                        reverse=True,
+                    ),
+                    self.inbox_size,
+                )
+            )
+            floor = recent[-1] if len(recent) == self.inbox_size else 0
+            inbox = _Inbox(recent[::-1], self.inbox_size, floor)
+            self._inboxes[username] = inbox
+        return inbox
+
+    def feed(
+        self, username: str, after: Optional[int] = None, number: int = 20
+    ) -> Tuple[List[Any], Optional[int]]:
+        # Newest first. `after` is the id of the last post already shown;
+        # returns the page and the id to continue after, if any.
+        limit = float("inf") if after is None else after
+        friends = self.graph.friend_set(username)
+        celebrities = {
+            friend for friend in friends if self._is_celebrity(friend)
+        }
+        light = list(friends - celebrities)
+
+        with self._lock:
+            inbox = self._inbox(username, light)
+            floor = inbox.floor
+            # Inbox ids down to its floor, then the light friends' own logs
+            # below it; the second part is only built if the page gets there.
+            recent = (
+                id
+                for id in reversed(inbox.ids)
+                if id < limit and id >= floor
+            )
+            older = heapq.merge(
+                *(
+                    _below(self._logs.get(friend, []), min(limit, floor))
+                    for friend in (light if floor else ())
+                ),
+                reverse=True,
+            )
+            sources = [itertools.chain(recent, older)]
+            sources.extend(
+                _below(self._logs.get(author, []), limit)
+                for author in [*celebrities, username]
+            )
+
+            posts = []
+            previous = None
+            for id in heapq.merge(*sources, reverse=True):
+                # An author that became a celebrity can still have older
+                # posts in inboxes; skip the second copy.
+                if id == previous:
+                    continue
+                previous = id
+                posts.append(self._posts[id])
+                if len(posts) > number:
+                    break
+
+        if len(posts) > number:
+            return posts[:number], posts[number - 1].ID
+        return posts, None
@@ -0,0 +1,78 @@
+"""Index tasks by user and creation time
+
+Revision ID: 5c1d7e2a9b40
+Revises: 32894c59eea3
+Create Date: 2026-10-17 10:12:31.406518
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1d7e2a9b40'
+down_revision = '32894c59eea3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ix_task_id duplicates the primary key and nothing filters on text.
+    op.drop_index('ix_task_text', table_name='task')
+    op.drop_index('ix_task_id', table_name='task')
+
+    # Added as nullable, backfilled, then tightened; SQLite can only do the
+    # last step by rebuilding the table, hence the batch operations.
+    with op.batch_alter_table('task') as batch_op:
+        batch_op.add_column(
+            sa.Column('created_at', sa.DateTime(), nullable=True)
+        )
+    # Existing tasks were listed in insertion order, so backfill them a
+    # microsecond apart in rowid order, ending now. Going through a DateTime
+    # column writes the same text format as the app, which keyset
+    # comparisons on created_at rely on.
+    connection = op.get_bind()
+    ids = connection.execute(
+        sa.text(
+            "SELECT id FROM task WHERE created_at IS NULL ORDER BY rowid"
+        )
+    ).scalars().all()
+    if ids:
+        task = sa.table(
+            'task',
+            sa.column('id', sa.String),
+            sa.column('created_at', sa.DateTime),
+        )
+        start = datetime.utcnow() - timedelta(microseconds=len(ids) - 1)
+        connection.execute(
+            task.update()
+            .where(task.c.id == sa.bindparam('task_id'))
+            .values(created_at=sa.bindparam('created_at')),
+            [
+                {
+                    'task_id': id,
+                    'created_at': start + timedelta(microseconds=index),
+                }
+                for index, id in enumerate(ids)
+            ],
+        )
+    with op.batch_alter_table('task') as batch_op:
+        batch_op.alter_column(
+            'created_at', existing_type=sa.DateTime(), nullable=False
+        )
+        batch_op.create_index(
+            'ix_task_user_id_created_at_id',
+            ['user_id', 'created_at', 'id'],
+            unique=False,
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('task') as batch_op:
+        batch_op.drop_index('ix_task_user_id_created_at_id')
+        batch_op.drop_column('created_at')
+
+    op.create_index(op.f('ix_task_id'), 'task', ['id'], unique=False)
+    op.create_index(op.f('ix_task_text'), 'task', ['text'], unique=False)
@@ -0,0 +1,140 @@
+import uuid
+from datetime import datetime, timedelta
+from types import ModuleType
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+import models
+import schemas
+from crud import tasks_by_user_id_query
+
+
+async def get_user(db: AsyncSession, id: str):
+    result = await db.execute(select(models.User).where(models.User.id == id))
+    return result.scalars().first()
+
+
+async def get_user_by_username(db: AsyncSession, username: str):
+    result = await db.execute(
+        select(models.User).where(models.User.username == username)
+    )
+    return result.scalars().first()
+
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(
+        select(models.User).where(models.User.email == email)
+    )
+    return result.scalars().first()
+
+
+async def create_user(db: AsyncSession, user: schemas.UserCreate):
+    id = uuid.uuid4()
+    while await get_user(db=db, id=str(id)):
+        id = uuid.uuid4()
+
+    db_user = models.User(
+        id=str(id),
+        username=user.username,
+        name=user.name,
+        email=user.email,
+        hashed_password=user.hashed_password,
+    )
+
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+
+    return db_user
+
+
+async def get_tasks_by_user_id(
+    db: AsyncSession,
+    id: str,
+    after: Optional[Tuple[datetime, str]] = None,
+    limit: int = 100,
+):
+    result = await db.execute(
+        tasks_by_user_id_query(id=id, after=after, limit=limit)
+    )
+    return result.scalars().all()
+
+
+async def get_task_by_id(db: AsyncSession, id: str):
+    result = await db.execute(select(models.Task).where(models.Task.id == id))
+    return result.scalars().first()
+
+
+async def add_task(db: AsyncSession, task: schemas.TaskCreate, id: str):
+    db_task = models.Task(
+        id=str(uuid.uuid4()),
+        text=task.text,
+        user_id=id,
+        created_at=datetime.utcnow(),
+    )
+    try:
+        await db.execute(
+            insert(models.Task).values(
+                id=db_task.id,
+                text=db_task.text,
+                user_id=db_task.user_id,
+                created_at=db_task.created_at,
+            )
+        )
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return None
+
+    return db_task
+
+
+async def add_tasks(
+    db: AsyncSession, tasks: List[schemas.TaskCreate], id: str
+):
+    # Rows are a microsecond apart, ending now, so the batch keeps its
+    # order under the (created_at, id) keyset.
+    start = datetime.utcnow() - timedelta(microseconds=len(tasks) - 1)
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "text": task.text,
+            "user_id": id,
+            "created_at": start + timedelta(microseconds=index),
+        }
+        for index, task in enumerate(tasks)
+    ]
+    if not rows:
+        return []
+    try:
+        await db.execute(insert(models.Task), rows)
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        return None
+
+    return [row["id"] for row in rows]
+
+
+async def delete_task(db: AsyncSession, id: str):
+    await db.execute(delete(models.Task).where(models.Task.id == id))
+    await db.commit()
+
+
+class ThreadpoolCrud:
+    # Gives the blocking functions of a sync crud module the same awaitable
+    # interface as this one by running each call in the threadpool.
+    def __init__(self, module: ModuleType):
+        self._module = module
+
+    def __getattr__(self, name: str):
+        function = getattr(self._module, name)
+
+        async def call(*args, **kwargs):
+            return await run_in_threadpool(function, *args, **kwargs)
+
+        return call
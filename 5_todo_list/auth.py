@@ -0,0 +1,109 @@
+import hashlib
+import heapq
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi_login.fastapi_login import LoginManager
+
+
+def _digest(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+class CachingLoginManager(LoginManager):
+    # LoginManager that remembers the claims of tokens it has already
+    # verified, keyed by a digest of the token, until the token's `exp`.
+    # Repeat requests with the same cookie skip the signature check. The
+    # cache is a bounded LRU. Revoked tokens are kept until they expire and
+    # never evicted before that, so the list is bounded by the logouts
+    # within one token lifetime; tokens without `exp` stay revoked for good.
+    def __init__(
+        self,
+        *args: Any,
+        token_cache_size: int = 4096,
+        token_cache_ttl: float = 300.0,
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+        self.token_cache_size = token_cache_size
+        # Only used for tokens without an `exp` claim.
+        self.token_cache_ttl = token_cache_ttl
+        self._tokens: "OrderedDict[bytes, Tuple[float, Dict]]" = OrderedDict()
+        self._revoked: Dict[bytes, float] = {}
+        self._revoked_expiry: List[Tuple[float, bytes]] = []
+        self._tokens_lock = threading.Lock()
+
+        self.token_hits = 0
+        self.token_misses = 0
+
+    def _get_payload(self, token: str) -> Dict:
+        key = _digest(token)
+        now = time.time()
+        with self._tokens_lock:
+            revoked = self._revoked.get(key)
+            if revoked is not None and revoked > now:
+                raise self.not_authenticated_exception
+
+            cached = self._tokens.get(key)
+            if cached is not None:
+                expires, payload = cached
+                if expires > now:
+                    self._tokens.move_to_end(key)
+                    self.token_hits += 1
+                    return payload
+                del self._tokens[key]
+
+        payload = super()._get_payload(token)
+        expires = payload.get("exp", now + self.token_cache_ttl)
+
+        with self._tokens_lock:
+            self.token_misses += 1
+            self._tokens[key] = (expires, payload)
+            if len(self._tokens) > self.token_cache_size:
+                self._tokens.popitem(last=False)
+
+        return payload
+
+    def revoke(self, token: Optional[str]) -> None:
+        # Forgets the token and refuses it until it would have expired.
+        if not token:
+            return
+        key = _digest(token)
+        with self._tokens_lock:
+            cached = self._tokens.pop(key, None)
+
+        if cached is not None:
+            payload = cached[1]
+        else:
+            try:
+                payload = super()._get_payload(token)
+            except Exception:
+                # Not a valid token, so there is nothing to refuse.
+                return
+        expires = payload.get("exp", float("inf"))
+
+        with self._tokens_lock:
+            self._purge_revoked(time.time())
+            if key not in self._revoked:
+                self._revoked[key] = expires
+                heapq.heappush(self._revoked_expiry, (expires, key))
+
+    def _purge_revoked(self, now: float) -> None:
+        # Drops revocations whose tokens have expired on their own.
+        expiry = self._revoked_expiry
+        while expiry and expiry[0][0] <= now:
+            _, key = heapq.heappop(expiry)
+            del self._revoked[key]
+
+    def token_cache_stats(self) -> Dict[str, Any]:
+        lookups = self.token_hits + self.token_misses
+        return {
+            "size": len(self._tokens),
+            "revoked": len(self._revoked),
+            "maxsize": self.token_cache_size,
+            "hits": self.token_hits,
+            "misses": self.token_misses,
+            "hit_ratio": self.token_hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,149 @@
+# Throughput of GET /api/tasks with the async database layer and with the
+# sync one (TODO_DB_ASYNC=0), each behind one uvicorn worker, from many
+# clients at once over keep-alive connections. Runs against a throwaway
+# database in a temporary directory; the client shares the machine, so
+# compare the two modes rather than reading the numbers as capacity.
+#
+#   python bench_async.py [clients] [seconds]
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+from sqlalchemy import create_engine
+
+import models
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+HOST = "127.0.0.1"
+PORT = 8766
+BASE_URL = f"http://{HOST}:{PORT}"
+LOGIN = {"username": "bench", "password": "bench-password"}
+
+
+def prepare(directory: str) -> None:
+    # The app opens ./todo_app.db and serves ./templates and ./static.
+    for name in ("templates", "static"):
+        os.symlink(os.path.join(APP_DIR, name), os.path.join(directory, name))
+    engine = create_engine(f"sqlite:///{directory}/todo_app.db")
+    models.Base.metadata.create_all(engine)
+    engine.dispose()
+
+
+def start_server(directory: str, use_async: bool) -> subprocess.Popen:
+    environment = {
+        **os.environ,
+        "PYTHONPATH": APP_DIR,
+        "SECRET_KEY": "bench-secret",
+        "TODO_DB_ASYNC": "1" if use_async else "0",
+    }
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--host",
+            HOST,
+            "--port",
+            str(PORT),
+            "--log-level",
+            "warning",
+            "--backlog",
+            "4096",
+        ],
+        cwd=directory,
+        env=environment,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline and server.poll() is None:
+        try:
+            requests.get(BASE_URL + "/login")
+            return server
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Server did not start")
+
+
+def log_in(tasks: int) -> str:
+    requests.post(
+        BASE_URL + "/register",
+        data={**LOGIN, "name": "Bench", "email": "bench@email.com"},
+        allow_redirects=False,
+    )
+    token = requests.post(
+        BASE_URL + "/login", data=LOGIN, allow_redirects=False
+    ).cookies["auth"]
+    requests.post(
+        BASE_URL + "/tasks/bulk",
+        json=[{"text": f"Task {index}"} for index in range(tasks)],
+        cookies={"auth": token},
+    ).raise_for_status()
+    return token
+
+
+async def client(token: str, deadline: float, latencies: list) -> None:
+    reader, writer = await asyncio.open_connection(HOST, PORT)
+    request = (
+        "GET /api/tasks?number=20 HTTP/1.1\r\n"
+        f"Host: {HOST}\r\n"
+        f"Cookie: auth={token}\r\n\r\n"
+    ).encode()
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        writer.write(request)
+        head = await reader.readuntil(b"\r\n\r\n")
+        if not head.startswith(b"HTTP/1.1 200"):
+            raise RuntimeError(head.decode(errors="replace"))
+        length = next(
+            int(line.split(b":", 1)[1])
+            for line in head.split(b"\r\n")
+            if line.lower().startswith(b"content-length:")
+        )
+        await reader.readexactly(length)
+        latencies.append(time.perf_counter() - start)
+    writer.close()
+
+
+async def load(token: str, clients: int, seconds: float) -> list:
+    latencies: list = []
+    deadline = time.monotonic() + seconds
+    await asyncio.gather(
+        *(client(token, deadline, latencies) for _ in range(clients))
+    )
+    return latencies
+
+
+def run(use_async: bool, clients: int, seconds: float) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        prepare(directory)
+        server = start_server(directory, use_async)
+        try:
+            token = log_in(tasks=50)
+            start = time.perf_counter()
+            latencies = asyncio.run(load(token, clients, seconds))
+            elapsed = time.perf_counter() - start
+        finally:
+            server.terminate()
+            server.wait()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(
+        f"{'async' if use_async else 'sync':<5} {clients} clients  "
+        f"{len(latencies) / elapsed:7,.0f} req/s  "
+        f"p50 {p50:7.1f}ms p99 {p99:7.1f}ms"
+    )
+
+
+if __name__ == "__main__":
+    arguments = sys.argv[1:]
+    clients = int(arguments[0]) if arguments else 500
+    seconds = float(arguments[1]) if len(arguments) > 1 else 20
+    for use_async in (True, False):
+        run(use_async, clients, seconds)
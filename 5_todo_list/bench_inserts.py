@@ -0,0 +1,112 @@
+# Task inserts per second on the production SQLite profile: the old
+# add_task (user lookup, id collision probe, add, commit, refresh), the
+# single-INSERT add_task, and add_tasks at a few batch sizes.
+#
+#   python bench_inserts.py [rows]
+import sys
+import tempfile
+import time
+import uuid
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+import crud
+import db
+import models
+import schemas
+
+USER = "bench-user"
+
+
+def probing_add_task(session, task: schemas.TaskCreate, id: str):
+    # add_task as it was before it became a single INSERT.
+    if not crud.get_user(db=session, id=id):
+        return None
+    task_id = uuid.uuid4()
+    while crud.get_task_by_id(db=session, id=str(task_id)):
+        task_id = uuid.uuid4()
+    db_task = models.Task(id=str(task_id), text=task.text, user_id=id)
+    session.add(db_task)
+    session.commit()
+    session.refresh(db_task)
+    return db_task
+
+
+def one_by_one(add):
+    def insert(session, tasks):
+        for task in tasks:
+            add(session, task, USER)
+
+    return insert
+
+
+def batched(size: int):
+    def insert(session, tasks):
+        for start in range(0, len(tasks), size):
+            crud.add_tasks(
+                db=session, tasks=tasks[start : start + size], id=USER
+            )
+
+    return insert
+
+
+def measure(insert, rows: int) -> float:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = db.sqlite_profile(
+            create_engine(
+                f"sqlite:///{directory}/todo_app.db",
+                connect_args={"check_same_thread": False},
+                poolclass=QueuePool,
+                pool_size=1,
+                max_overflow=0,
+            )
+        )
+        models.Base.metadata.create_all(engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        tasks = [
+            schemas.TaskCreate(text=f"Task {index}") for index in range(rows)
+        ]
+        with Session() as session:
+            session.add(
+                models.User(
+                    id=USER,
+                    username=USER,
+                    email="bench@email.com",
+                    hashed_password="",
+                )
+            )
+            session.commit()
+
+            start = time.perf_counter()
+            insert(session, tasks)
+            elapsed = time.perf_counter() - start
+
+            assert session.query(models.Task).count() == rows
+        engine.dispose()
+    return rows / elapsed
+
+
+def run(rows: int) -> None:
+    paths = [
+        ("add_task, probing", one_by_one(probing_add_task), rows // 10),
+        (
+            "add_task",
+            one_by_one(
+                lambda session, task, id: crud.add_task(
+                    db=session, task=task, id=id
+                )
+            ),
+            rows // 10,
+        ),
+        ("add_tasks, 100", batched(100), rows),
+        ("add_tasks, 10,000", batched(10_000), rows),
+    ]
+    for name, insert, count in paths:
+        print(f"{name:<18} {measure(insert, count):9,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    arguments = [int(argument) for argument in sys.argv[1:]]
+    run(arguments[0] if arguments else 100_000)
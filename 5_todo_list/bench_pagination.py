@@ -0,0 +1,111 @@
+# Latency of one page of a user's tasks at increasing depths, with the
+# (created_at, id) keyset used by get_tasks_by_user_id and with the OFFSET
+# query it replaced, for one user holding `tasks` tasks among other users'.
+#
+#   python bench_pagination.py [tasks]
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import Session
+
+import crud
+import db
+import models
+
+USER = "bench-user"
+PAGE = 100
+
+
+def fill(engine, tasks: int) -> None:
+    start = datetime(2021, 1, 1)
+    users = [USER, "other-user"]
+    with engine.begin() as connection:
+        connection.execute(
+            insert(models.User),
+            [
+                {
+                    "id": user,
+                    "username": user,
+                    "email": f"{user}@email.com",
+                    "hashed_password": "",
+                }
+                for user in users
+            ],
+        )
+        total = tasks * len(users)
+        for offset in range(0, total, 100_000):
+            connection.execute(
+                insert(models.Task),
+                [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "text": f"Task {index}",
+                        "user_id": users[index % len(users)],
+                        "created_at": start + timedelta(seconds=index),
+                    }
+                    for index in range(offset, min(offset + 100_000, total))
+                ],
+            )
+
+
+def offset_query(skip: int):
+    return (
+        select(models.Task)
+        .where(models.Task.user_id == USER)
+        .order_by(models.Task.created_at, models.Task.id)
+        .offset(skip)
+        .limit(PAGE)
+    )
+
+
+def timed(session: Session, query, repeat: int = 5) -> float:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = session.execute(query).scalars().all()
+        latencies.append(time.perf_counter() - start)
+    assert len(rows) == PAGE
+    return statistics.median(latencies) * 1000
+
+
+def run(tasks: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = db.sqlite_profile(
+            create_engine(f"sqlite:///{directory}/todo_app.db")
+        )
+        models.Base.metadata.create_all(engine)
+        start = time.perf_counter()
+        fill(engine, tasks)
+        print(
+            f"{tasks:,} tasks for one user, {tasks * 2:,} in all, "
+            f"written in {time.perf_counter() - start:.1f}s"
+        )
+
+        with Session(engine) as session:
+            for depth in (0, 1_000, tasks // 10, tasks // 2, tasks - PAGE):
+                after = None
+                if depth:
+                    # The task just before the page, as a cursor names it.
+                    previous = session.execute(
+                        offset_query(depth - 1).limit(1)
+                    ).scalar_one()
+                    after = crud.decode_cursor(crud.encode_cursor(previous))
+                keyset = crud.tasks_by_user_id_query(
+                    id=USER, after=after, limit=PAGE
+                )
+                print(
+                    f"  after {depth:>9,}  "
+                    f"keyset {timed(session, keyset):7.2f}ms  "
+                    f"offset {timed(session, offset_query(depth)):7.2f}ms"
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    arguments = [int(argument) for argument in sys.argv[1:]]
+    run(arguments[0] if arguments else 1_000_000)
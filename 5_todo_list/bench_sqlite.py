@@ -0,0 +1,114 @@
+# Mixed read/write throughput through crud, from a pool of threads, on the
+# engine the app used to create (default journal, a connection per
+# session) and on the production profile from db.py (WAL, pragmas, one
+# pooled writer and a pool of readers). Each run gets a fresh database.
+#
+#   python bench_sqlite.py [threads] [operations] [write percent]
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+
+import crud
+import db
+import models
+import schemas
+
+USERS = 50
+
+
+def default_sessions(url: str):
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    return factory, factory
+
+
+def profiled_sessions(url: str):
+    writer = db.sqlite_profile(
+        create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=QueuePool,
+            pool_size=1,
+            max_overflow=0,
+        )
+    )
+    readers = db.sqlite_profile(
+        create_engine(
+            url,
+            connect_args={"check_same_thread": False},
+            poolclass=QueuePool,
+            pool_size=db.SQLITE_READERS,
+            max_overflow=0,
+        ),
+        read_only=True,
+    )
+    return (
+        sessionmaker(autocommit=False, autoflush=False, bind=writer),
+        sessionmaker(autocommit=False, autoflush=False, bind=readers),
+    )
+
+
+def run(name, sessions, threads, operations, writes) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        url = f"sqlite:///{directory}/todo_app.db"
+        setup = create_engine(url)
+        models.Base.metadata.create_all(setup)
+        with setup.begin() as connection:
+            connection.execute(
+                models.User.__table__.insert(),
+                [
+                    {
+                        "id": f"user{index}",
+                        "username": f"user{index}",
+                        "email": f"user{index}@email.com",
+                        "hashed_password": "",
+                    }
+                    for index in range(USERS)
+                ],
+            )
+        setup.dispose()
+
+        write_session, read_session = sessions(url)
+        failed = []
+
+        def operation(index: int) -> None:
+            user = f"user{index % USERS}"
+            if index % 100 < writes:
+                with write_session() as session:
+                    task = schemas.TaskCreate(text=str(uuid.uuid4()))
+                    try:
+                        crud.add_task(db=session, task=task, id=user)
+                    except Exception as error:
+                        # "database is locked" on the default engine.
+                        failed.append(error)
+            else:
+                with read_session() as session:
+                    crud.get_tasks_by_user_id(db=session, id=user)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(threads) as executor:
+            list(executor.map(operation, range(operations)))
+        elapsed = time.perf_counter() - start
+
+    print(
+        f"{name:<8} {threads} threads, {writes}% writes  "
+        f"{operations / elapsed:7,.0f} ops/s  {len(failed)} failed writes"
+    )
+
+
+if __name__ == "__main__":
+    arguments = [int(argument) for argument in sys.argv[1:]]
+    threads = arguments[0] if arguments else 16
+    operations = arguments[1] if len(arguments) > 1 else 5000
+    writes = arguments[2] if len(arguments) > 2 else 20
+    for name, sessions in (
+        ("default", default_sessions),
+        ("profile", profiled_sessions),
+    ):
+        run(name, sessions, threads, operations, writes)
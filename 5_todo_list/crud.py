@@ -1,11 +1,45 @@
+import base64
 import uuid
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 import models
 import schemas
 
 
+def encode_cursor(task: models.Task) -> str:
+    # Opaque position of a task in its user's (created_at, id) order.
+    position = f"{task.created_at.isoformat()}|{task.id}"
+    return base64.urlsafe_b64encode(position.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        created_at, id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        )
+        return datetime.fromisoformat(created_at), id
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+def tasks_by_user_id_query(
+    id: str, after: Optional[Tuple[datetime, str]] = None, limit: int = 100
+):
+    # Keyset pagination: seeks straight to `after` on the
+    # (user_id, created_at, id) index, so every page costs the same.
+    query = select(models.Task).where(models.Task.user_id == id)
+    if after is not None:
+        query = query.where(
+            tuple_(models.Task.created_at, models.Task.id) > tuple_(*after)
+        )
+    return query.order_by(models.Task.created_at, models.Task.id).limit(limit)
+
+
 def get_user(db: Session, id: str):
     return db.query(models.User).filter(models.User.id == id).first()
 
@@ -41,13 +75,14 @@ def create_user(db: Session, user: schemas.UserCreate):
 
 
 def get_tasks_by_user_id(
-    db: Session, id: str, skip: int = 0, limit: int = 100
+    db: Session,
+    id: str,
+    after: Optional[Tuple[datetime, str]] = None,
+    limit: int = 100,
 ):
     return (
-        db.query(models.Task)
-        .filter(models.Task.user_id == id)
-        .offset(skip)
-        .limit(limit)
+        db.execute(tasks_by_user_id_query(id=id, after=after, limit=limit))
+        .scalars()
         .all()
     )
 
@@ -57,19 +92,55 @@ def get_task_by_id(db: Session, id: str):
 
 
 def add_task(db: Session, task: schemas.TaskCreate, id: str):
-    if not get_user(db=db, id=str(id)):
+    # A single INSERT: uuid4 ids do not collide in practice, and the user
+    # foreign key rejects unknown users.
+    db_task = models.Task(
+        id=str(uuid.uuid4()),
+        text=task.text,
+        user_id=id,
+        created_at=datetime.utcnow(),
+    )
+    try:
+        db.execute(
+            insert(models.Task).values(
+                id=db_task.id,
+                text=db_task.text,
+                user_id=db_task.user_id,
+                created_at=db_task.created_at,
+            )
+        )
+        db.commit()
+    except IntegrityError:
+        db.rollback()
         return None
 
-    task_id = uuid.uuid4()
-    while get_task_by_id(db=db, id=str(task_id)):
-        task_id = uuid.uuid4()
+    return db_task
 
-    db_task = models.Task(id=str(task_id), text=task.text, user_id=id)
-    db.add(db_task)
-    db.commit()
-    db.refresh(db_task)
 
-    return db_task
+def add_tasks(db: Session, tasks: List[schemas.TaskCreate], id: str):
+    # One transaction and one executemany for the whole batch.
+    # Rows are a microsecond apart, ending now, so the batch keeps its
+    # order under the (created_at, id) keyset.
+    start = datetime.utcnow() - timedelta(microseconds=len(tasks) - 1)
+    rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "text": task.text,
+            "user_id": id,
+            "created_at": start + timedelta(microseconds=index),
+        }
+        for index, task in enumerate(tasks)
+    ]
+    if not rows:
+        return []
+    try:
+        db.execute(insert(models.Task), rows)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return None
+
+    return [row["id"] for row in rows]
 
 
 def delete_task(db: Session, id: str):
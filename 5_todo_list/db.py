@@ -1,20 +1,117 @@
-from sqlalchemy import create_engine
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 SQLALCHEMY_DATABASE_URI = "sqlite:///./todo_app.db"
+SQLALCHEMY_ASYNC_DATABASE_URI = "sqlite+aiosqlite:///./todo_app.db"
+
+# Set TODO_DB_ASYNC=0 to serve requests through the sync engine instead.
+DB_ASYNC = os.environ.get("TODO_DB_ASYNC", "1").lower() not in (
+    "0",
+    "false",
+    "no",
+)
+
+# Applied to every new connection. In WAL mode readers and the writer do
+# not block each other, and synchronous=NORMAL only fsyncs at checkpoints
+# rather than on every commit, which is still safe against corruption.
+SQLITE_PRAGMAS = {
+    "synchronous": os.environ.get("TODO_SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.environ.get("TODO_SQLITE_MMAP_SIZE", 256 << 20)),
+    # Negative sizes are in KiB.
+    "cache_size": int(os.environ.get("TODO_SQLITE_CACHE_SIZE", -64_000)),
+    "busy_timeout": int(os.environ.get("TODO_SQLITE_BUSY_TIMEOUT", 5_000)),
+    "foreign_keys": "ON",
+}
+SQLITE_READERS = int(os.environ.get("TODO_SQLITE_READERS", 4))
+
+
+def sqlite_profile(engine, read_only: bool = False):
+    # Sets the pragmas on each connection the engine opens; read-only
+    # engines additionally refuse writes.
+    pragmas = {"journal_mode": "WAL", **SQLITE_PRAGMAS}
+    if read_only:
+        pragmas["query_only"] = "ON"
+
+    @event.listens_for(getattr(engine, "sync_engine", engine), "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return engine
+
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URI, connect_args={"check_same_thread": False}
+# SQLite allows one writer at a time, so writes share a single pooled
+# connection and queue for it here rather than on the file lock; reads get
+# a pool of their own.
+engine = sqlite_profile(
+    create_engine(
+        SQLALCHEMY_DATABASE_URI,
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+)
+read_engine = sqlite_profile(
+    create_engine(
+        SQLALCHEMY_DATABASE_URI,
+        connect_args={"check_same_thread": False},
+        poolclass=QueuePool,
+        pool_size=SQLITE_READERS,
+        max_overflow=0,
+    ),
+    read_only=True,
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=read_engine
+)
+
+async_engine = sqlite_profile(
+    create_async_engine(
+        SQLALCHEMY_ASYNC_DATABASE_URI,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+    )
+)
+async_read_engine = sqlite_profile(
+    create_async_engine(
+        SQLALCHEMY_ASYNC_DATABASE_URI,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=SQLITE_READERS,
+        max_overflow=0,
+    ),
+    read_only=True,
+)
+
+AsyncSessionLocal = sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+AsyncReadSessionLocal = sessionmaker(
+    bind=async_read_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
 
 class DBContext:
-    def __init__(self):
-        self.db = SessionLocal()
+    def __init__(self, read_only: bool = False):
+        self.db = ReadSessionLocal() if read_only else SessionLocal()
 
     def __enter__(self):
         return self.db
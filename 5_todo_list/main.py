@@ -1,28 +1,51 @@
 import os
-from datetime import timedelta
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 
 from dotenv import load_dotenv
-from fastapi import Depends, FastAPI, Form, Path, Request, Response, status
+from fastapi import (
+    Body,
+    Depends,
+    FastAPI,
+    Form,
+    HTTPException,
+    Path,
+    Request,
+    status,
+)
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import RedirectResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi_login.fastapi_login import LoginManager
 from passlib.context import CryptContext
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-import crud
+import async_crud
+import crud as sync_crud
 import models
 import schemas
-from db import DBContext, SessionLocal, engine
+from auth import CachingLoginManager
+from db import (
+    DB_ASYNC,
+    AsyncReadSessionLocal,
+    AsyncSessionLocal,
+    DBContext,
+    SessionLocal,
+    engine,
+)
 
 load_dotenv()
 
 SECRET_KEY = os.environ.get("SECRET_KEY")
 ACCESS_TOKEN_EXPIRES_MINUTES = 60
+MAX_BULK_TASKS = 10_000
+TASKS_PAGE_SIZE = 100
 
-manager = LoginManager(SECRET_KEY, token_url="/login", use_cookie=True)
+manager = CachingLoginManager(
+    SECRET_KEY, token_url="/login", use_cookie=True
+)
 manager.cookie_name = "auth"
 password_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -31,35 +54,61 @@ templates = Jinja2Templates(directory="templates")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 
-def get_db():
-    with DBContext() as db:
-        yield db
+# Either way crud calls are awaited; with the sync engine each one runs in
+# the threadpool.
+crud = async_crud if DB_ASYNC else async_crud.ThreadpoolCrud(sync_crud)
+
+
+async def get_db():
+    if DB_ASYNC:
+        async with AsyncSessionLocal() as db:
+            yield db
+    else:
+        with DBContext() as db:
+            yield db
 
 
-def get_hashed_password(plain_password):
-    return password_context.hash(plain_password)
+async def get_read_db():
+    # For routes that never write: served by the reader pool.
+    if DB_ASYNC:
+        async with AsyncReadSessionLocal() as db:
+            yield db
+    else:
+        with DBContext(read_only=True) as db:
+            yield db
 
 
-def verify_password(plain_password, hashed_password):
-    return password_context.verify(plain_password, hashed_password)
+async def get_hashed_password(plain_password):
+    return await run_in_threadpool(password_context.hash, plain_password)
+
+
+async def verify_password(plain_password, hashed_password):
+    return await run_in_threadpool(
+        password_context.verify, plain_password, hashed_password
+    )
 
 
 @manager.user_loader()
-def get_user(username: str, db: Session = None):
+async def get_user(username: str, db: Session = None):
     if db is None:
-        with DBContext() as db:
-            return crud.get_user_by_username(db=db, username=username)
-    return crud.get_user_by_username(db=db, username=username)
+        if DB_ASYNC:
+            async with AsyncReadSessionLocal() as db:
+                return await crud.get_user_by_username(
+                    db=db, username=username
+                )
+        with DBContext(read_only=True) as db:
+            return await crud.get_user_by_username(db=db, username=username)
+    return await crud.get_user_by_username(db=db, username=username)
 
 
-def authenticate_user(
+async def authenticate_user(
     username: str, password: str, db: Session = Depends(get_db)
 ):
-    user = crud.get_user_by_username(db=db, username=username)
+    user = await crud.get_user_by_username(db=db, username=username)
 
     if not user:
         return None
-    if not verify_password(
+    if not await verify_password(
         plain_password=password, hashed_password=user.hashed_password
     ):
         return None
@@ -82,47 +131,96 @@ app.add_exception_handler(
 
 
 @app.get("/")
-def root(request: Request):
+async def root(request: Request):
     return templates.TemplateResponse(
         "index.html", {"request": request, "title": "Home"}
     )
 
 
+def parse_cursor(after: Optional[str]) -> Optional[Tuple[datetime, str]]:
+    if after is None:
+        return None
+    try:
+        return sync_crud.decode_cursor(after)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor"
+        )
+
+
+async def task_page(
+    db: Session, id: str, after: Optional[str] = None, number: int = 100
+) -> Tuple[List[models.Task], Optional[str]]:
+    # Oldest first. Fetches one extra row to know whether there is a next
+    # page; returns the page and the cursor for it, if any.
+    tasks = await crud.get_tasks_by_user_id(
+        db=db, id=id, after=parse_cursor(after), limit=number + 1
+    )
+    if len(tasks) > number:
+        return tasks[:number], sync_crud.encode_cursor(tasks[number - 1])
+    return tasks, None
+
+
 @app.get("/tasks")
-def get_tasks(
+async def get_tasks(
     request: Request,
-    db: Session = Depends(get_db),
+    after: Optional[str] = None,
+    db: Session = Depends(get_read_db),
     user: schemas.User = Depends(manager),
 ):
+    tasks, next_cursor = await task_page(
+        db=db, id=user.id, after=after, number=TASKS_PAGE_SIZE
+    )
     return templates.TemplateResponse(
         "tasks.html",
         {
             "request": request,
             "title": "Tasks",
             "user": user,
-            "tasks": crud.get_tasks_by_user_id(db=db, id=user.id),
+            "tasks": tasks,
+            "next_cursor": next_cursor,
         },
     )
 
 
+@app.get("/api/tasks")
+async def list_tasks(
+    after: Optional[str] = None,
+    number: int = TASKS_PAGE_SIZE,
+    db: Session = Depends(get_read_db),
+    user: schemas.User = Depends(manager),
+):
+    tasks, next_cursor = await task_page(
+        db=db, id=user.id, after=after, number=min(max(number, 1), 1000)
+    )
+    return {
+        "tasks": [schemas.Task.from_orm(task) for task in tasks],
+        "next": next_cursor,
+    }
+
+
 @app.post("/tasks")
-def add_task(
+async def add_task(
     request: Request,
     text: str = Form(...),
     db: Session = Depends(get_db),
     user: schemas.User = Depends(manager),
 ):
-    added = crud.add_task(
+    added = await crud.add_task(
         db=db, task=schemas.TaskCreate(text=text), id=user.id
     )
     if not added:
+        tasks, next_cursor = await task_page(
+            db=db, id=user.id, number=TASKS_PAGE_SIZE
+        )
         return templates.TemplateResponse(
             "tasks.html",
             {
                 "request": request,
                 "title": "Tasks",
                 "user": user,
-                "tasks": crud.get_tasks_by_user_id(db=db, id=user.id),
+                "tasks": tasks,
+                "next_cursor": next_cursor,
                 "invalid": True,
             },
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -131,30 +229,52 @@ def add_task(
         return RedirectResponse("/tasks", status_code=status.HTTP_302_FOUND)
 
 
+@app.post("/tasks/bulk", status_code=status.HTTP_201_CREATED)
+async def add_tasks(
+    tasks: List[schemas.TaskCreate] = Body(...),
+    db: Session = Depends(get_db),
+    user: schemas.User = Depends(manager),
+):
+    if len(tasks) > MAX_BULK_TASKS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {MAX_BULK_TASKS} tasks per request",
+        )
+
+    ids = await crud.add_tasks(db=db, tasks=tasks, id=user.id)
+    if ids is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Could not add tasks",
+        )
+
+    return {"ids": ids}
+
+
 @app.get("/tasks/delete/{id}", response_class=RedirectResponse)
-def delete_task(
+async def delete_task(
     id: str = Path(...),
     db: Session = Depends(get_db),
     user: schemas.User = Depends(manager),
 ):
-    crud.delete_task(db=db, id=id)
+    await crud.delete_task(db=db, id=id)
     return RedirectResponse("/tasks")
 
 
 @app.get("/login")
-def get_login(request: Request):
+async def get_login(request: Request):
     return templates.TemplateResponse(
         "login.html", {"request": request, "title": "Login"}
     )
 
 
 @app.post("/login")
-def login(
+async def login(
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    user = authenticate_user(
+    user = await authenticate_user(
         username=form_data.username, password=form_data.password, db=db
     )
 
@@ -176,14 +296,14 @@ def login(
 
 
 @app.get("/register")
-def get_register(request: Request):
+async def get_register(request: Request):
     return templates.TemplateResponse(
         "register.html", {"request": request, "title": "Register"}
     )
 
 
 @app.post("/register")
-def register(
+async def register(
     request: Request,
     username: str = Form(...),
     email: str = Form(...),
@@ -191,15 +311,15 @@ def register(
     password: str = Form(...),
     db: Session = Depends(get_db),
 ):
-    hashed_password = get_hashed_password(password)
+    hashed_password = await get_hashed_password(password)
     invalid = False
-    if crud.get_user_by_username(db=db, username=username):
+    if await crud.get_user_by_username(db=db, username=username):
         invalid = True
-    if crud.get_user_by_email(db=db, email=email):
+    if await crud.get_user_by_email(db=db, email=email):
         invalid = True
 
     if not invalid:
-        crud.create_user(
+        await crud.create_user(
             db=db,
             user=schemas.UserCreate(
                 username=username,
@@ -221,7 +341,8 @@ def register(
 
 
 @app.get("/logout")
-def logout(response: Response):
+async def logout(request: Request):
+    manager.revoke(request.cookies.get(manager.cookie_name))
     response = RedirectResponse("/")
     manager.set_cookie(response, None)
 
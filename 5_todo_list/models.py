@@ -1,4 +1,6 @@
-from sqlalchemy import Column, ForeignKey, Integer, String
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from db import Base
@@ -20,9 +22,15 @@ class User(Base):
 
 class Task(Base):
     __tablename__ = "task"
+    __table_args__ = (
+        # Serves the per-user task list in creation order; the primary key
+        # already indexes id on its own.
+        Index("ix_task_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
 
-    id = Column(String, primary_key=True, index=True, nullable=False)
-    text = Column(String, index=True, nullable=False)
+    id = Column(String, primary_key=True, nullable=False)
+    text = Column(String, nullable=False)
     user_id = Column(String, ForeignKey("user.id"), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
 
     user = relationship("User", back_populates="items")
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List, Optional
 
 from pydantic import BaseModel
@@ -10,6 +11,7 @@ class TaskBase(BaseModel):
 class Task(TaskBase):
     id: str
     user_id: str
+    created_at: datetime
 
     class Config:
         orm_mode = True
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine
+
+import crud
+import models
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.mark.parametrize("after", [None, (datetime(2021, 1, 1), "task-id")])
+def test_tasks_by_user_id_uses_index(engine, after):
+    query = crud.tasks_by_user_id_query(id="user-id", after=after, limit=100)
+    sql = query.compile(engine, compile_kwargs={"literal_binds": True})
+
+    with engine.connect() as connection:
+        plan = connection.exec_driver_sql(
+            f"EXPLAIN QUERY PLAN {sql}"
+        ).fetchall()
+
+    details = [row[-1] for row in plan]
+    assert any(
+        "USING INDEX ix_task_user_id_created_at_id" in detail
+        for detail in details
+    ), details
+    # The index already yields rows in order, so nothing is sorted.
+    assert not any("TEMP B-TREE" in detail for detail in details), details
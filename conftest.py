@@ -0,0 +1,45 @@
+import os
+import sys
+
+# Each app is a flat directory of top-level modules, several of them with
+# the same names (main, db, auth, cache), and each app opens its templates
+# and data relative to the working directory. When collection or a test
+# moves to another app, step into its directory and drop the previous
+# app's modules, so its own get imported.
+ROOT = os.path.dirname(os.path.abspath(__file__))
+_start = os.getcwd()
+_current = None
+
+
+def _app_dir(path) -> str:
+    return os.path.dirname(os.path.abspath(str(path)))
+
+
+def _enter(directory: str) -> None:
+    global _current
+    if directory == _current:
+        return
+    _current = directory
+
+    for name, module in list(sys.modules.items()):
+        filename = getattr(module, "__file__", None) or ""
+        home = os.path.dirname(os.path.abspath(filename)) if filename else ""
+        if home.startswith(ROOT + os.sep) and home != directory:
+            del sys.modules[name]
+    if directory in sys.path:
+        sys.path.remove(directory)
+    sys.path.insert(0, directory)
+    os.chdir(directory)
+
+
+def pytest_collectstart(collector):
+    if collector.fspath is not None and collector.fspath.ext == ".py":
+        _enter(_app_dir(collector.fspath))
+
+
+def pytest_runtest_setup(item):
+    _enter(_app_dir(item.fspath))
+
+
+def pytest_sessionfinish(session):
+    os.chdir(_start)